@@ -1,67 +1,185 @@
 import os
 import sys
-import re 
-from modules.mod import get_log_files
+import csv
+import json
+import argparse
+from modules import stats
+from modules.mod import list_log_files
+from modules.engine import run, to_epoch
+from modules.analyzers import ExtractAnalyzer
+from modules.store import STORE_DIR, StoreWriter, is_fresh, parse_time, query
 
-parent_dir_path, files = get_log_files()
+# python 1_extract_info.py ../                          => interactive menu
+# python 1_extract_info.py ../ --fields timestamp,device --format csv --output out.csv
+# python 1_extract_info.py ../ --ingest                 => build ../logstore once
+# python 1_extract_info.py ../ --device R4 --level ERROR --since "2025-10-19 06:00" --until "2025-10-19 08:00"
 
-# logs formate
-LINE_REGEX = re.compile(
-    r"(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) "
-    r"(?P<device>\S+) "
-    r"(?P<level>\S+) "
-    r"(?P<event>.+)"
-)
+# output is block-buffered even on a terminal / pipe => one write() per ~1 MB
+OUTPUT_BUFFER = 1024 * 1024
+
+
+# record = (timestamp, device, level, event)
+# 3. eventType && 4. keyDetails
+def details(record):
+    words = record[3].split()
+    return f"{words[0]} {words[1]} {words[-1]}"
+
+
+FIELDS = {
+    "timestamp": lambda record: record[0],
+    "device": lambda record: record[1],
+    "level": lambda record: record[2],
+    "event": lambda record: record[3],
+    "details": details,
+}
+
+parser = argparse.ArgumentParser(description="Extract information from the logs")
+parser.add_argument("logs_dir")
+parser.add_argument("--fields", help=f"comma separated, from: {','.join(FIELDS)}")
+parser.add_argument("--format", choices=["text", "csv", "jsonl"], default="text")
+parser.add_argument("--output", help="output file (default: stdout)")
+parser.add_argument("--ingest", action="store_true",
+                    help="(re)build the columnar store of the logs and exit")
+parser.add_argument("--store", help=f"columnar store directory (default: <logs_dir>/{STORE_DIR})")
+parser.add_argument("--device")
+parser.add_argument("--level")
+parser.add_argument("--since", help='"YYYY-MM-DD[ HH:MM[:SS]]", inclusive')
+parser.add_argument("--until", help='"YYYY-MM-DD[ HH:MM[:SS]]", exclusive')
+parser.add_argument("--stats", action="store_true", help="JSON run summary on stderr")
+parser.add_argument("--profile", action="store_true", help="cProfile of the run on stderr")
+args = parser.parse_args()
+
+parent_dir_path = args.logs_dir
+files = list_log_files(parent_dir_path)
+store_dir = args.store or os.path.join(parent_dir_path, STORE_DIR)
+
+since = parse_time(args.since) if args.since else None
+until = parse_time(args.until) if args.until else None
+filtered = any(value is not None for value in (args.device, args.level, since, until))
+
+
+def matches(record):
+    timestamp, device, level, event = record
+    if args.device is not None and device != args.device:
+        return False
+    if args.level is not None and level != args.level:
+        return False
+    if since is not None or until is not None:
+        ts = to_epoch(timestamp)
+        if since is not None and ts < since:
+            return False
+        if until is not None and ts >= until:
+            return False
+    return True
+
+
+def make_writer(out, fields, output_format):
+    # => required_info(record) writing the selected fields of one record to out
+    getters = [FIELDS[field] for field in fields]
+
+    if output_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        return lambda record: writer.writerow([get(record) for get in getters])
+
+    if output_format == "jsonl":
+        dumps = json.dumps
+        return lambda record: out.write(
+            dumps({field: get(record) for field, get in zip(fields, getters)}) + "\n")
+
+    if len(getters) == 1:
+        get = getters[0]
+        return lambda record: out.write(get(record) + "\n")
+    return lambda record: out.write(" ".join([get(record) for get in getters]) + "\n")
+
+
+# grep info based on required_info func, all files in one pass
+def print_info(files, parent_dir_path, required_info, out, headers=False):
+    # filtered query + store => only the matching blocks are read
+    if filtered and os.path.exists(os.path.join(store_dir, "meta.json")):
+        if is_fresh(store_dir, [os.path.join(parent_dir_path, filename) for filename in files]):
+            if headers:
+                out.write(f"\n## Store:  {store_dir} \n\n")
+            for record in query(store_dir, args.device, args.level, since, until):
+                required_info(record)
+            return
+        print(f"## {store_dir} is out of date (logs changed since --ingest), scanning the logs",
+              file=sys.stderr)
+
+    if filtered:
+        extract = required_info
+        required_info = lambda record: matches(record) and extract(record)
+
+    analyzer = ExtractAnalyzer(required_info)
+    if not headers:
+        run([os.path.join(parent_dir_path, filename) for filename in files], [analyzer])
+        return
 
-# grep info based on required_info func
-def print_info(files, parent_dir_path, required_info):
     for filename in files:
-        print("\n## File Name: ", filename, '\n')
-        filepath = os.path.join(parent_dir_path, filename)
+        out.write(f"\n## File Name:  {filename} \n\n")
+        run([os.path.join(parent_dir_path, filename)], [analyzer])
 
-        with open(filepath, "r") as f:
-            for line in f:
-                # skip empty line
-                # if not line.strip():
-                #     continue
-                line_formate = LINE_REGEX.match(line.strip())
-                if not line_formate: 
-                    continue
 
-                parts = line.strip().split()
-                required_info(parts)
+def open_output(path):
+    if path:
+        return open(path, "w", buffering=OUTPUT_BUFFER, newline="")
+    sys.stdout.flush()
+    return open(sys.stdout.fileno(), "w", buffering=OUTPUT_BUFFER, newline="", closefd=False)
 
-# 1. timeStamp
-def timestamp(parts):
-    print(parts[0], parts[1])
 
-# 2. deviceName
-def device(parts):
-    print(parts[2])
+def ask_fields():
+    # Ask what they want
+    print("Choose what you want to extract: \n"
+    "1) Time Stamps \n"
+    "2) Device Names \n"
+    "3) Event Type + Key Details \n")
 
-# 3. eventType && 4. keyDetails
-def event_type(parts):
-    print(parts[4], parts[5], parts[-1])
+    choice = input("Enter choice (1-4): ")
+    menu = {
+        "1": ("Time Stamps", ["timestamp"]),
+        "2": ("Device Names", ["device"]),
+        "3": ("Event Type + Key Details", ["details"]),
+    }
+    if choice not in menu:
+        print("Invalid choice!")
+        return None
+
+    title, fields = menu[choice]
+    print(f"\n## {title}:")
+    return fields
 
-# Ask what they want
-print("Choose what you want to extract: \n"
-"1) Time Stamps \n"
-"2) Device Names \n"
-"3) Event Type + Key Details \n")
 
-choice = input("Enter choice (1-4): ")
+def main():
+    if args.ingest:
+        file_paths = [os.path.join(parent_dir_path, filename) for filename in files]
+        try:
+            writer = StoreWriter(store_dir, file_paths)
+        except ValueError as e:
+            parser.error(str(e))
+        run(file_paths, [writer])[0].report()
+        return
 
-if choice == "1":
-    print("\n## Time Stamps:")
-    print_info(files, parent_dir_path, timestamp)
+    headers = False
+    if args.fields:
+        fields = [field.strip() for field in args.fields.split(",")]
+        unknown = [field for field in fields if field not in FIELDS]
+        if unknown:
+            parser.error(f"unknown field(s): {', '.join(unknown)}")
+    else:
+        fields = ask_fields()
+        if fields is None:
+            return
+        headers = args.format == "text"
 
-elif choice == "2":
-    print("\n## Device Names:")
-    print_info(files, parent_dir_path, device)
+    with open_output(args.output) as out:
+        print_info(files, parent_dir_path, make_writer(out, fields, args.format), out, headers)
 
-elif choice == "3":
-    print("\n## Event Type + Key Details:")
-    print_info(files, parent_dir_path, event_type)
 
-else:
-    print("Invalid choice!")
\ No newline at end of file
+with stats.session("1_extract_info"):
+    try:
+        main()
+    except BrokenPipeError:
+        # the reader went away (| head) => stop quietly, stdout (fd 1, shared by
+        # the output writer) goes to /dev/null so the flush at exit cannot fail again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
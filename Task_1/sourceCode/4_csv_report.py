@@ -1,86 +1,29 @@
 import os
-import re
-import csv
-from collections import defaultdict
-from modules.mod import get_log_files  
+from modules import stats
+from modules.mod import get_log_paths, get_workers, has_flag
+from modules.analyzers import CsvReportAnalyzer
+from modules.csv_state import STATE_FILE, update_report
 
-LINE_REGEX = re.compile(
-    r"(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) "
-    r"(?P<device>\S+) "
-    r"(?P<level>\S+) "
-    r"(?P<event>.+)"
-)
-
-# severity order
-SEVERITY_ORDER = {"INFO": 1, "WARNING": 2, "ERROR": 3}
-
-def map_risk(level: str) -> str: # return str
-    if level == "ERROR":
-        return "High"
-    if level == "WARNING":
-        return "Medium"
-    return "Low"
 
+# python 4_csv_report.py ../          => only new / changed log data is parsed
+# python 4_csv_report.py ../ --full   => forget the saved state and rebuild it
+# python 4_csv_report.py ../ --raw-events => one row per raw event text (no templates)
+# python 4_csv_report.py ../ --stats  => JSON run summary on stderr (--profile: cProfile)
 def main():
-    parent_dir_path, files = get_log_files()
-
-    # Build full file paths using parent_dir_path
-    file_paths = []
-    for f in files:
-        file_paths.append(os.path.join(parent_dir_path, f))
-
-    # Parse logs
-    data = defaultdict(lambda: {
-        "count": 0,
-        "last_seen": "",
-        "max_level": "INFO"
-    })
-
-    for file_path in file_paths:
-        with open(file_path, "r") as f:
-            for line in f:
-                line_formate = LINE_REGEX.match(line.strip())
-                if not line_formate:
-                    continue
-
-                # grouping
-                ts     = line_formate.group("timestamp")
-                device = line_formate.group("device")
-                level  = line_formate.group("level")
-                event  = line_formate.group("event")
-
-                # all logs from the same device with the same event go into the same group.
-                key   = (device, event)
-                entry = data[key]
+    parent_dir_path, file_paths = get_log_paths()
 
-                # Count occurrences
-                entry["count"] += 1
+    state_path = os.path.join(parent_dir_path, STATE_FILE)
+    if has_flag("--full") and os.path.exists(state_path):
+        os.remove(state_path)
 
-                # Update last seen timestamp
-                if entry["last_seen"] == "" or ts > entry["last_seen"]:
-                    entry["last_seen"] = ts
-
-                # Track highest severity
-                if SEVERITY_ORDER.get(level, 0) > SEVERITY_ORDER.get(entry["max_level"], 0):
-                    entry["max_level"] = level
-
-    # Write CSV output
+    # Parse logs + Write CSV output
     output_path = os.path.join(parent_dir_path, "report.csv")
-
-    with open(output_path, "w", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["Device", "Event", "Count", "Last_Seen", "Risk_Level"])
-
-        for (device, event), entry in data.items():
-            risk = map_risk(entry["max_level"])
-            writer.writerow([
-                device,
-                event,
-                entry["count"],
-                entry["last_seen"],
-                risk
-            ])
-
-    print(f"## CSV report created: {output_path}")
-
-main()
+    analyzer = CsvReportAnalyzer(output_path, templates=not has_flag("--raw-events"))
+    parsed = update_report(parent_dir_path, file_paths, analyzer, get_workers())
+    print(f"## {parsed} new/changed log file(s) parsed")
+    with stats.timer("report"):
+        analyzer.report()
+
+if __name__ == "__main__":
+    with stats.session("4_csv_report"):
+        main()
@@ -0,0 +1,27 @@
+# BGP flaps + CPU flaps + CSV report in ONE pass over the log files
+# python 5_run_all.py ../ [--workers N] [--stats] [--profile]
+import os
+from modules import stats
+from modules.mod import get_log_paths, get_workers
+from modules.parallel import run_parallel
+from modules.analyzers import BgpFlapAnalyzer, CpuFlapAnalyzer, CsvReportAnalyzer
+
+
+def main():
+    parent_dir_path, file_paths = get_log_paths()
+
+    analyzers = [
+        BgpFlapAnalyzer(),
+        CpuFlapAnalyzer(),
+        CsvReportAnalyzer(os.path.join(parent_dir_path, "report.csv")),
+    ]
+
+    run_parallel(file_paths, analyzers, get_workers())
+
+    with stats.timer("report"):
+        for analyzer in analyzers:
+            analyzer.report()
+
+if __name__ == "__main__":
+    with stats.session("5_run_all"):
+        main()
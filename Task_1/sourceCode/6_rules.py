@@ -0,0 +1,34 @@
+# Evaluate the flap rules of rules.json in ONE pass over the log files
+# python 6_rules.py ../ [--rules rules.json] [--workers N] [--follow] [--stats] [--profile]
+import os
+import sys
+from modules import stats
+from modules.mod import get_log_paths, get_workers, has_flag
+from modules.parallel import run_parallel
+from modules.follow import follow
+from modules.rules import load_rules, RuleAnalyzer
+
+
+def get_rules_path():
+    args = sys.argv[2:]
+    if "--rules" in args:
+        return args[args.index("--rules") + 1]
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+
+
+def main():
+    parent_dir_path, file_paths = get_log_paths()
+    analyzer = RuleAnalyzer(load_rules(get_rules_path()))
+
+    if has_flag("--follow"):
+        follow(parent_dir_path, [analyzer])
+        return
+
+    run_parallel(file_paths, [analyzer], get_workers())
+    with stats.timer("report"):
+        analyzer.report()
+
+
+if __name__ == "__main__":
+    with stats.session("6_rules"):
+        main()
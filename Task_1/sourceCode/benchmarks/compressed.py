@@ -0,0 +1,69 @@
+# Throughput of the single-pass engine on plain vs compressed logs
+# python -m benchmarks.compressed ../ [--repeat 2000]
+# the sample logs are repeated --repeat times into a temp dir, then written as
+# .log, .log.gz, .log.bz2 and .log.xz and parsed with all analyzers
+import os
+import sys
+import bz2
+import gzip
+import lzma
+import time
+import tempfile
+from modules.mod import get_log_paths
+from modules.engine import run
+from modules.analyzers import BgpFlapAnalyzer, CpuFlapAnalyzer, CsvReportAnalyzer
+
+WRITERS = {
+    ".log": open,
+    ".log.gz": gzip.open,
+    ".log.bz2": bz2.open,
+    ".log.xz": lzma.open,
+}
+
+
+def get_repeat():
+    args = sys.argv[2:]
+    if "--repeat" in args:
+        return int(args[args.index("--repeat") + 1])
+    return 2000
+
+
+def main():
+    parent_dir_path, file_paths = get_log_paths()
+    repeat = get_repeat()
+
+    sample = b""
+    for file_path in file_paths:
+        if file_path.endswith(".log"):
+            with open(file_path, "rb") as f:
+                sample += f.read()
+    data = sample * repeat
+    lines = data.count(b"\n")
+    size_mb = len(data) / 1024 / 1024
+
+    print(f"## {lines} lines, {size_mb:.1f} MB uncompressed\n")
+    print(f"{'format':<10}{'disk MB':>10}{'seconds':>10}{'lines/s':>12}{'MB/s':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix, writer in WRITERS.items():
+            bench_path = os.path.join(tmp, "bench" + suffix)
+            with writer(bench_path, "wb") as f:
+                f.write(data)
+
+            analyzers = [
+                BgpFlapAnalyzer(),
+                CpuFlapAnalyzer(),
+                CsvReportAnalyzer(os.path.join(tmp, "report.csv")),
+            ]
+            start = time.perf_counter()
+            run([bench_path], analyzers)
+            seconds = time.perf_counter() - start
+
+            disk_mb = os.path.getsize(bench_path) / 1024 / 1024
+            print(f"{suffix:<10}{disk_mb:>10.2f}{seconds:>10.2f}"
+                  f"{lines / seconds:>12.0f}{size_mb / seconds:>10.1f}")
+            os.remove(bench_path)
+
+
+if __name__ == "__main__":
+    main()
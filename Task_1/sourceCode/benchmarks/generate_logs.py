@@ -0,0 +1,90 @@
+# Synthetic log generator, same "YYYY-MM-DD HH:MM:SS DEVICE LEVEL event" format
+# python -m benchmarks.generate_logs OUT_DIR [--lines 1000000] [--devices 50]
+#        [--files 3] [--flap-density 0.01] [--start "2025-10-17 00:00:00"] [--seed 1]
+# --flap-density: share of lines that start a burst of BGP downs / high-CPU events
+import os
+import random
+import argparse
+from modules.engine import to_epoch, format_epoch
+
+# (level, event) as in the sample logs, {x} are filled per line
+EVENTS = [
+    ("INFO", "Interface GigabitEthernet0/{port} changed state to up"),
+    ("INFO", "Interface GigabitEthernet0/{port} changed state to down"),
+    ("INFO", "Interface GigabitEthernet0/{port} line protocol is up"),
+    ("WARNING", "Interface GigabitEthernet0/{port} input errors detected"),
+    ("ERROR", "SNMP authentication failure from 10.0.{a}.{b}"),
+    ("INFO", "BGP neighbor 10.{a}.{b}.2 established"),
+    ("INFO", "BGP neighbor 10.{a}.{b}.2 went down"),
+    ("INFO", "CPU utilization exceeded {cpu}%"),
+    ("INFO", "CPU utilization returned to normal"),
+    ("WARNING", "Temperature sensor {port} exceeded threshold"),
+    ("INFO", "Temperature sensor {port} returned to normal"),
+]
+
+BURSTS = [
+    "BGP neighbor 10.{a}.{b}.2 went down",
+    "CPU utilization exceeded {cpu}%",
+]
+
+
+def fill(event, rnd):
+    return event.format(port=rnd.randint(0, 9), a=rnd.randint(0, 255),
+                        b=rnd.randint(1, 254), cpu=rnd.randint(81, 99))
+
+
+def generate(out_dir, lines=1000000, devices=50, files=3, flap_density=0.01,
+             start="2025-10-17 00:00:00", seed=1):
+    rnd = random.Random(seed)
+    names = [f"R{i + 1}" for i in range(devices)]
+    os.makedirs(out_dir, exist_ok=True)
+
+    t = to_epoch(start)
+    per_file = lines // files
+    for file_no in range(files):
+        file_path = os.path.join(out_dir, f"generated_{file_no + 1:03d}.log")
+        with open(file_path, "w", buffering=1024 * 1024) as f:
+            batch = []
+            written = 0
+            while written + len(batch) < per_file:
+                t += rnd.randint(0, 3)
+                device = rnd.choice(names)
+
+                if rnd.random() < flap_density:
+                    # burst: 3-6 events of one kind within a few minutes
+                    event = rnd.choice(BURSTS)
+                    for _ in range(rnd.randint(3, 6)):
+                        t += rnd.randint(5, 120)
+                        batch.append(f"{format_epoch(t)} {device} INFO {fill(event, rnd)}\n")
+                else:
+                    level, event = rnd.choice(EVENTS)
+                    batch.append(f"{format_epoch(t)} {device} {level} {fill(event, rnd)}\n")
+
+                if len(batch) >= 10000:
+                    f.writelines(batch)
+                    written += len(batch)
+                    batch = []
+
+            f.writelines(batch)
+
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic router logs")
+    parser.add_argument("out_dir")
+    parser.add_argument("--lines", type=int, default=1000000)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--files", type=int, default=3)
+    parser.add_argument("--flap-density", type=float, default=0.01)
+    parser.add_argument("--start", default="2025-10-17 00:00:00")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    generate(args.out_dir, args.lines, args.devices, args.files,
+             args.flap_density, args.start, args.seed)
+    print(f"## {args.lines} lines written to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Lines per second before / after the bytes keyword prefilter
+# python -m benchmarks.prefilter ../ [--repeat 2000]
+# before = the old per-line loop: text read, strip(), full regex, strip().split()
+# after  = modules.engine.run() with the sparse BGP / CPU analyzers
+import os
+import re
+import time
+import tempfile
+from modules.mod import get_log_paths
+from modules.engine import run
+from modules.analyzers import BgpFlapAnalyzer, CpuFlapAnalyzer
+from benchmarks.compressed import get_repeat
+
+old_bgp_down_regex = re.compile(
+    r"(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+"
+    r"(?P<device>\S+)\s+INFO\s+BGP neighbor\s+"
+    r"(?P<neighbor>\d+\.\d+\.\d+\.\d+)\s+went down"
+)
+
+old_cpu_exceeded_regex = re.compile(
+    r"^\s*(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+"
+    r"(?P<device>\S+)\s+INFO\s+CPU utilization exceeded\s+"
+    r"(?P<value>\d+)%\s*$",
+    re.IGNORECASE
+)
+
+
+def old_loop(file_path, regex):
+    found = 0
+    with open(file_path, "r") as f:
+        for line in f:
+            if not regex.match(line.strip()):
+                continue
+            parts = line.strip().split()
+            found += len(parts) > 0
+    return found
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parent_dir_path, file_paths = get_log_paths()
+
+    sample = b""
+    for file_path in file_paths:
+        if file_path.endswith(".log"):
+            with open(file_path, "rb") as f:
+                sample += f.read()
+    data = sample * get_repeat()
+    lines = data.count(b"\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_path = os.path.join(tmp, "bench.log")
+        with open(bench_path, "wb") as f:
+            f.write(data)
+
+        print(f"## {lines} lines\n")
+        print(f"{'analyzer':<10}{'before lines/s':>16}{'after lines/s':>16}{'speedup':>10}")
+
+        cases = [
+            ("BGP", old_bgp_down_regex, BgpFlapAnalyzer),
+            ("CPU", old_cpu_exceeded_regex, CpuFlapAnalyzer),
+        ]
+        for name, regex, analyzer_class in cases:
+            before = timed(lambda: old_loop(bench_path, regex))
+            after = timed(lambda: run([bench_path], [analyzer_class()]))
+            print(f"{name:<10}{lines / before:>16.0f}{lines / after:>16.0f}"
+                  f"{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# Benchmark harness for the Task_1 analyzers
+# python -m benchmarks.run [LOGS_DIR] [--lines 300000] [--save-baseline] [--check]
+# without LOGS_DIR synthetic logs are generated (benchmarks.generate_logs)
+# every case runs in a fresh process => throughput, peak RSS, per-stage timings
+# (best of --repeat runs, to keep the noise out of --check)
+# --save-baseline writes benchmarks/baseline.json, --check fails (exit 1) when a
+# case is slower / bigger than the baseline by more than --tolerance
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from modules.mod import list_log_files
+from modules.engine import run
+from modules.analyzers import ExtractAnalyzer, BgpFlapAnalyzer, CpuFlapAnalyzer, CsvReportAnalyzer
+from modules.rules import load_rules, RuleAnalyzer
+from modules.store import StoreWriter
+from benchmarks.generate_logs import generate
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rules.json")
+
+
+def make_analyzers(case, tmp, file_paths):
+    if case == "extract":
+        out = open(os.devnull, "w", buffering=1024 * 1024)
+        return [ExtractAnalyzer(lambda record: out.write(record[1] + "\n"))]
+    if case == "bgp":
+        return [BgpFlapAnalyzer()]
+    if case == "cpu":
+        return [CpuFlapAnalyzer()]
+    if case == "csv":
+        return [CsvReportAnalyzer(os.path.join(tmp, "report.csv"))]
+    if case == "rules":
+        return [RuleAnalyzer(load_rules(RULES_PATH))]
+    if case == "store":
+        return [StoreWriter(os.path.join(tmp, "logstore"), file_paths)]
+    if case == "run_all":
+        return [BgpFlapAnalyzer(), CpuFlapAnalyzer(),
+                CsvReportAnalyzer(os.path.join(tmp, "report.csv"))]
+    raise ValueError(case)
+
+
+CASES = ["extract", "bgp", "cpu", "csv", "rules", "store", "run_all"]
+
+
+def run_once(case, file_paths, tmp):
+    stages = {}
+
+    start = time.perf_counter()
+    analyzers = make_analyzers(case, tmp, file_paths)
+    stages["setup"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run(file_paths, analyzers)
+    stages["read+match"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for analyzer in analyzers:
+            analyzer.report()
+    stages["report"] = time.perf_counter() - start
+
+    return stages
+
+
+def run_case(case, file_paths, tmp, repeat=1):
+    # child process side
+    best = None
+    for _ in range(repeat):
+        stages = run_once(case, file_paths, tmp)
+        if best is None or sum(stages.values()) < sum(best.values()):
+            best = stages
+
+    return {
+        "seconds": sum(best.values()),
+        "stages": best,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def check(results, baseline, tolerance):
+    # => regressions, results measured on the baseline's line count
+    failures = []
+    for case, result in results.items():
+        base = baseline["cases"].get(case)
+        if base is None:
+            continue
+        if result["lines_per_sec"] < base["lines_per_sec"] * (1 - tolerance):
+            failures.append(f"{case}: {result['lines_per_sec']:.0f} lines/s "
+                            f"< baseline {base['lines_per_sec']:.0f}")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            failures.append(f"{case}: {result['peak_rss_mb']:.1f} MB "
+                            f"> baseline {base['peak_rss_mb']:.1f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Task_1 analyzers")
+    parser.add_argument("logs_dir", nargs="?")
+    parser.add_argument("--lines", type=int, default=300000)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--flap-density", type=float, default=0.01)
+    parser.add_argument("--cases", default=",".join(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logs_dir = args.logs_dir
+        if logs_dir is None:
+            logs_dir = generate(os.path.join(tmp, "logs"), args.lines, args.devices,
+                                flap_density=args.flap_density)
+        file_paths = [os.path.join(logs_dir, file) for file in list_log_files(logs_dir)]
+
+        lines = 0
+        size = 0
+        for file_path in file_paths:
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    lines += block.count(b"\n")
+                    size += len(block)
+
+        print(f"## {lines} lines, {size / 1024 / 1024:.1f} MB, {len(file_paths)} file(s)\n")
+        print(f"{'case':<10}{'lines/s':>12}{'MB/s':>8}{'peak MB':>9}  stages (s)")
+
+        results = {}
+        for case in args.cases.split(","):
+            # a fresh process per case => the peak RSS belongs to that case only
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result = pool.submit(run_case, case, file_paths, tmp, args.repeat).result()
+
+            result["lines_per_sec"] = lines / result["seconds"]
+            result["mb_per_sec"] = size / 1024 / 1024 / result["seconds"]
+            results[case] = result
+
+            stages = " ".join(f"{name}={seconds:.2f}" for name, seconds in result["stages"].items())
+            print(f"{case:<10}{result['lines_per_sec']:>12.0f}{result['mb_per_sec']:>8.1f}"
+                  f"{result['peak_rss_mb']:>9.1f}  {stages}")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({"lines": lines, "cases": results}, f, indent=2)
+        print(f"\n## Baseline saved: {BASELINE_PATH}")
+
+    if args.check:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        # throughput (fixed start-up costs) and peak memory both depend on the
+        # input size => only compared on the baseline's line count
+        if baseline["lines"] != lines:
+            print(f"\n## Not checked: the baseline was measured on {baseline['lines']} lines, "
+                  f"run with --lines {baseline['lines']}")
+            return
+        failures = check(results, baseline, args.tolerance)
+        if failures:
+            print("\n## Regressions:")
+            for failure in failures:
+                print(failure)
+            sys.exit(1)
+        print("\n## No regression against the baseline")
+
+
+if __name__ == "__main__":
+    main()
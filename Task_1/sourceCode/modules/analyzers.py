@@ -0,0 +1,265 @@
+# Analyzers fed by modules.engine.run()
+# dense analyzers get every record (timestamp, device, level, event) through feed(),
+# sparse ones declare bytes `keywords` + `pattern` and get feed_match(match) only
+# for candidate lines, merge() adds the partial result of a worker
+# (modules.parallel) and report() prints / writes the result
+import re
+import csv
+from array import array
+from modules import stats
+from modules.engine import to_epoch, format_epoch
+from modules.window import FlapWindow, detect_flaps
+from modules.template import extract
+
+# severity order
+SEVERITY_ORDER = {"INFO": 1, "WARNING": 2, "ERROR": 3}
+RANK_LEVEL = {rank: level for level, rank in SEVERITY_ORDER.items()}
+
+# Regex to match ONLY BGP down lines (raw bytes line)
+bgp_down_regex = re.compile(
+    rb"\s*(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+"
+    rb"(?P<device>\S+)\s+INFO\s+BGP neighbor\s+"
+    rb"(?P<neighbor>\d+\.\d+\.\d+\.\d+)\s+went down"
+)
+
+# CPU exceeded (raw bytes line)
+cpu_exceeded_regex = re.compile(
+    rb"\s*(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+"
+    rb"(?P<device>\S+)\s+INFO\s+CPU utilization exceeded\s+"
+    rb"(?P<value>\d+)%\s*$",
+    re.IGNORECASE
+)
+
+
+def map_risk(level: str) -> str: # return str
+    if level == "ERROR":
+        return "High"
+    if level == "WARNING":
+        return "Medium"
+    return "Low"
+
+
+class ExtractAnalyzer:
+    # prints one field of every line, required_info(record) picks the field
+    def __init__(self, required_info):
+        self.required_info = required_info
+
+    def feed(self, record):
+        self.required_info(record)
+
+    def report(self):
+        pass
+
+
+class FlapAnalyzer:
+    # shared part of the BGP / CPU analyzers
+    # events: device => array('q') of epoch seconds, so windows work across days
+    # live mode (modules.follow): no history is kept, every device has its own
+    # FlapWindow and an alert is printed as soon as a flap episode starts
+    label = "events"
+
+    def __init__(self, window, threshold):
+        self.window = window
+        self.threshold = threshold
+        self.events = {}
+        self.live = None
+
+    def start_live(self):
+        self.live = {}
+
+    def add(self, device, timestamp):
+        t = to_epoch(timestamp)
+
+        if self.live is not None:
+            flap_window = self.live.get(device)
+            if flap_window is None:
+                flap_window = self.live[device] = FlapWindow(self.window, self.threshold)
+
+            episode = flap_window.add(t)
+            if episode is not None:
+                print(f"[ALERT] {device}: {episode[2]} {self.label} within "
+                      f"{self.window // 60} minutes (since {format_epoch(episode[0])})",
+                      flush=True)
+            return
+
+        if device not in self.events:
+            self.events[device] = array("q")
+        self.events[device].append(t)
+        """
+        Example:
+        {'R4': array('q', [1760856741]), 'R1': array('q', [1760857249])}
+        """
+
+    def merge(self, other):
+        for device, times in other.events.items():
+            if device not in self.events:
+                self.events[device] = array("q")
+            self.events[device].extend(times)
+
+    def episodes(self):
+        # => [(device, [(start, end, peak), ...]), ...]
+        if self.live is not None:
+            return [(device, [tuple(e) for e in flap_window.episodes])
+                    for device, flap_window in self.live.items()]
+
+        return [(device, detect_flaps(sorted(times), self.window, self.threshold))
+                for device, times in self.events.items()]
+
+    def header(self):
+        return f"\n## {self.label} (>={self.threshold} in {self.window // 60} minutes)\n"
+
+    def report(self):
+        print(self.header())
+
+        with stats.timer("detect"):
+            episodes_by_device = self.episodes()
+
+        minutes = self.window // 60
+        for device, episodes in episodes_by_device:
+            for start, end, peak in episodes:
+                print(f"{device}: {peak} {self.label} within {minutes} minutes "
+                      f"({format_epoch(start)} -> {format_epoch(end)})")
+
+
+class BgpFlapAnalyzer(FlapAnalyzer):
+    # BGP flap detection (>=3 downs in 10 minutes)
+    label = "BGP Down flaps"
+
+    def __init__(self, window=10 * 60, threshold=3):
+        super().__init__(window, threshold)
+
+    # only lines with the keyword reach the regex
+    keywords = (b"BGP neighbor",)
+    pattern = bgp_down_regex
+
+    def feed_match(self, line_formate):
+        self.add(line_formate.group("device").decode(),
+                 line_formate.group("timestamp").decode())
+
+    def header(self):
+        return f"\n## BGP flap dtection (>={self.threshold} in {self.window // 60} minutes)\n"
+
+
+class CpuFlapAnalyzer(FlapAnalyzer):
+    # CPU >80% more than 2 times in 1 hour
+    label = "high-CPU events"
+
+    def __init__(self, window=60 * 60, threshold=3):
+        super().__init__(window, threshold)
+
+    # only lines with the keyword reach the regex
+    keywords = (b"CPU utilization",)
+    pattern = cpu_exceeded_regex
+
+    def feed_match(self, cpu_exceeded_line_formate):
+        # Only consider CPU > 80
+        cpu_value = int(cpu_exceeded_line_formate.group("value"))
+        if cpu_value <= 80:
+            return
+
+        self.add(cpu_exceeded_line_formate.group("device").decode(),
+                 cpu_exceeded_line_formate.group("timestamp").decode())
+
+    def header(self):
+        return "\n## CPU >80% more than 2 times in 1 hour: \n"
+
+
+class CsvReportAnalyzer:
+    # all logs from the same device with the same event go into the same group
+    # device / event strings are dictionary-encoded (stored once), one group is
+    # an int key (device_id << 32 | event_id) => row number in 3 array columns
+    # templates=True groups on the event template (modules.template): one row per
+    # event kind, "BGP neighbor <IP> went down", instead of one per neighbor
+    def __init__(self, output_path, templates=True):
+        self.output_path = output_path
+        self.templates = templates
+        self.device_ids = {}
+        self.device_names = []
+        self.event_ids = {}
+        self.event_names = []
+        self.rows = {}
+        self.counts = array("q")
+        self.last_seen = array("q")    # epoch seconds
+        self.max_rank = array("b")     # SEVERITY_ORDER, INFO at least
+
+    def group(self, device, event):
+        # => row of (device, event), created on first sight
+        device_id = self.device_ids.get(device)
+        if device_id is None:
+            device_id = self.device_ids[device] = len(self.device_names)
+            self.device_names.append(device)
+
+        event_id = self.event_ids.get(event)
+        if event_id is None:
+            event_id = self.event_ids[event] = len(self.event_names)
+            self.event_names.append(event)
+
+        key = device_id << 32 | event_id
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = len(self.counts)
+            self.counts.append(0)
+            self.last_seen.append(0)
+            self.max_rank.append(1)
+        return row
+
+    def add(self, device, event, count, last_seen, rank):
+        row = self.group(device, event)
+
+        # Count occurrences
+        self.counts[row] += count
+
+        # Update last seen timestamp
+        if last_seen > self.last_seen[row]:
+            self.last_seen[row] = last_seen
+
+        # Track highest severity
+        if rank > self.max_rank[row]:
+            self.max_rank[row] = rank
+
+    def feed(self, record):
+        ts, device, level, event = record
+        if self.templates:
+            event = extract(event)[0]
+
+        row = self.group(device, event)
+
+        # Count occurrences
+        self.counts[row] += 1
+
+        # Update last seen timestamp
+        last_seen = to_epoch(ts)
+        if last_seen > self.last_seen[row]:
+            self.last_seen[row] = last_seen
+
+        # Track highest severity
+        rank = SEVERITY_ORDER.get(level, 0)
+        if rank > self.max_rank[row]:
+            self.max_rank[row] = rank
+
+    def groups(self):
+        # => (device, event, count, last_seen, max_rank) in first-seen order
+        for key, row in self.rows.items():
+            yield (self.device_names[key >> 32], self.event_names[key & 0xFFFFFFFF],
+                   self.counts[row], self.last_seen[row], self.max_rank[row])
+
+    def merge(self, other):
+        for group in other.groups():
+            self.add(*group)
+
+    def report(self):
+        with open(self.output_path, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["Device", "Event", "Count", "Last_Seen", "Risk_Level"])
+
+            for device, event, count, last_seen, max_rank in self.groups():
+                risk = map_risk(RANK_LEVEL[max_rank])
+                writer.writerow([
+                    device,
+                    event,
+                    count,
+                    format_epoch(last_seen),
+                    risk
+                ])
+
+        print(f"## CSV report created: {self.output_path}")
@@ -0,0 +1,182 @@
+# Incremental CSV report: the aggregation of 4_csv_report.py is kept in a small
+# SQLite sidecar next to the logs, together with a checkpoint per file
+# (inode, size, mtime, parsed offset and the bytes right before that offset)
+# a re-run only parses new files and the bytes appended since the last run
+import os
+import sqlite3
+from modules.engine import complete_end, is_compressed, run_range, to_epoch, format_epoch
+from modules.parallel import CHUNK_SIZE, split_file, map_chunks
+from modules.analyzers import CsvReportAnalyzer
+
+STATE_FILE = "report_state.db"
+
+# bytes before the checkpoint that must be unchanged for the file to count as "appended"
+FINGERPRINT_SIZE = 64
+
+def open_state(state_path):
+    conn = sqlite3.connect(state_path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS files (
+            name TEXT PRIMARY KEY,
+            inode INTEGER,
+            size INTEGER,
+            mtime INTEGER,
+            offset INTEGER,
+            fingerprint BLOB
+        )
+    """)
+
+    # one row per (file, device, event) so a rewritten / removed file can be dropped
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS aggregates (
+            name TEXT,
+            device TEXT,
+            event TEXT,
+            count INTEGER,
+            last_seen TEXT,
+            max_rank INTEGER,
+            PRIMARY KEY (name, device, event)
+        )
+    """)
+
+    # how the events were grouped (raw text / templates)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+    return conn
+
+
+def check_grouping(conn, analyzer):
+    # a state built with the other grouping cannot be reused => start over
+    grouping = "templates" if analyzer.templates else "raw"
+    row = conn.execute("SELECT value FROM settings WHERE key = 'grouping'").fetchone()
+    if row is not None and row[0] != grouping:
+        conn.execute("DELETE FROM aggregates")
+        conn.execute("DELETE FROM files")
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('grouping', ?)", (grouping,))
+
+
+def read_fingerprint(file_path, offset):
+    start = max(0, offset - FINGERPRINT_SIZE)
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        return f.read(offset - start)
+
+
+def forget(conn, name):
+    conn.execute("DELETE FROM aggregates WHERE name = ?", (name,))
+    conn.execute("DELETE FROM files WHERE name = ?", (name,))
+
+
+def changed_ranges(conn, file_paths):
+    # => [(file_path, start, end, stat), ...] that still have to be parsed,
+    #    [(file_path, start, end), ...] unfinished last lines (not checkpointed)
+    known = {}
+    for row in conn.execute("SELECT name, inode, size, mtime, offset, fingerprint FROM files"):
+        known[row[0]] = row[1:]
+
+    ranges = []
+    tails = []
+    for file_path in file_paths:
+        name = os.path.basename(file_path)
+        st = os.stat(file_path)
+        start = 0
+
+        checkpoint = known.pop(name, None)
+        if checkpoint is not None:
+            inode, size, mtime, offset, fingerprint = checkpoint
+
+            # untouched since the last run
+            if (inode, size, mtime) == (st.st_ino, st.st_size, st.st_mtime_ns):
+                if offset < st.st_size:
+                    tails.append((file_path, offset, st.st_size))
+                continue
+
+            # same file, only appended => continue from the checkpoint
+            # (archives are never appended to, a changed archive is re-read)
+            if (inode == st.st_ino and st.st_size >= offset
+                    and not is_compressed(file_path)
+                    and read_fingerprint(file_path, offset) == fingerprint):
+                start = offset
+            else:
+                forget(conn, name)
+
+        if is_compressed(file_path):
+            end = st.st_size
+        else:
+            end = complete_end(file_path, start, st.st_size)
+            if end < st.st_size:
+                tails.append((file_path, end, st.st_size))
+        ranges.append((file_path, start, end, st))
+
+    # files that are gone from the directory
+    for name in known:
+        forget(conn, name)
+
+    return ranges, tails
+
+
+def save_partial(conn, name, analyzer):
+    conn.executemany("""
+        INSERT INTO aggregates (name, device, event, count, last_seen, max_rank)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (name, device, event) DO UPDATE SET
+            count = count + excluded.count,
+            last_seen = max(last_seen, excluded.last_seen),
+            max_rank = max(max_rank, excluded.max_rank)
+    """, [
+        (name, device, event, count, format_epoch(last_seen), max_rank)
+        for device, event, count, last_seen, max_rank in analyzer.groups()
+    ])
+
+
+def load_report(conn, analyzer):
+    # totals over all files, in first-seen order
+    rows = conn.execute("""
+        SELECT device, event, SUM(count), MAX(last_seen), MAX(max_rank)
+        FROM aggregates
+        GROUP BY device, event
+        ORDER BY MIN(rowid)
+    """)
+    for device, event, count, last_seen, max_rank in rows:
+        analyzer.add(device, event, count, to_epoch(last_seen), max_rank)
+
+
+def update_report(parent_dir_path, file_paths, analyzer, workers=1):
+    # fills analyzer from the sidecar after parsing what changed
+    # => number of files that had new data
+    conn = open_state(os.path.join(parent_dir_path, STATE_FILE))
+
+    # one transaction: an interrupted run leaves the previous state untouched
+    with conn:
+        check_grouping(conn, analyzer)
+        ranges, tails = changed_ranges(conn, file_paths)
+
+        chunks = []
+        for file_path, start, end, st in ranges:
+            # (split_file() reads compressed files as one chunk up to EOF)
+            chunks.extend(split_file(file_path, CHUNK_SIZE, start, end))
+
+        blank = [CsvReportAnalyzer(analyzer.output_path, analyzer.templates)]
+        for chunk, partial in zip(chunks, map_chunks(chunks, blank, workers)):
+            save_partial(conn, os.path.basename(chunk[0]), partial[0])
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO files (name, inode, size, mtime, offset, fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(os.path.basename(file_path), st.st_ino, st.st_size, st.st_mtime_ns,
+              end, read_fingerprint(file_path, end))
+             for file_path, start, end, st in ranges],
+        )
+
+    load_report(conn, analyzer)
+    conn.close()
+
+    # a last line without its newline yet: in this report only, the checkpoint
+    # stays before it so it is parsed again once the line is finished
+    for file_path, start, end in tails:
+        run_range(file_path, [analyzer], start, end)
+    return len(ranges)
@@ -0,0 +1,193 @@
+# Single-pass log engine: every log file is read once, each line is parsed
+# into a compact record and the record is handed to all registered analyzers.
+import os
+import re
+import bz2
+import gzip
+import lzma
+import time
+import calendar
+from modules import stats
+from modules.scanner import scan_range
+
+# logs formate
+LINE_REGEX = re.compile(
+    r"(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) "
+    r"(?P<device>\S+) "
+    r"(?P<level>\S+) "
+    r"(?P<event>.+)"
+)
+
+
+# rotated archives are decompressed on the fly, chunk by chunk, no temp files
+OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+
+def is_compressed(file_path):
+    return os.path.splitext(file_path)[1] in OPENERS
+
+
+def open_log(file_path):
+    # binary stream of the (decompressed) log lines
+    opener = OPENERS.get(os.path.splitext(file_path)[1], open)
+    return opener(file_path, "rb")
+
+
+def parse_line(line):
+    # "2025-10-19 06:52:21 R4 INFO BGP neighbor 10.1.1.2 went down"
+    # => ("2025-10-19 06:52:21", "R4", "INFO", "BGP neighbor 10.1.1.2 went down")
+    line_formate = LINE_REGEX.match(line.strip())
+    if not line_formate:
+        return None
+    return line_formate.group("timestamp", "device", "level", "event")
+
+
+# "2025-10-19" => epoch seconds of midnight, one strptime per day
+_day_start = {}
+
+
+def to_epoch(timestamp):
+    # "2025-10-19 06:52:21" => 1760856741 (the logs carry no timezone => UTC)
+    day = timestamp[:10]
+    start = _day_start.get(day)
+    if start is None:
+        start = calendar.timegm(time.strptime(day, "%Y-%m-%d"))
+        _day_start[day] = start
+
+    return (start
+            + int(timestamp[11:13]) * 3600
+            + int(timestamp[14:16]) * 60
+            + int(timestamp[17:19]))
+
+
+def format_epoch(seconds):
+    # 1760856741 => "2025-10-19 06:52:21"
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(seconds))
+
+
+def complete_end(file_path, start, size):
+    # offset right after the last newline in [start, size)
+    # a half-written last line is left for the next read
+    block = 4096
+    with open(file_path, "rb") as f:
+        pos = size
+        while pos > start:
+            read_from = max(start, pos - block)
+            f.seek(read_from)
+            data = f.read(pos - read_from)
+            newline = data.rfind(b"\n")
+            if newline != -1:
+                return read_from + newline + 1
+            pos = read_from
+
+    return start
+
+
+def keyword_finder(keywords):
+    # one compiled alternation for all keywords of an analyzer
+    # => finder.search(line) costs about the same for 1 or 100 keywords
+    return re.compile(b"|".join(re.escape(keyword) for keyword in keywords))
+
+
+def split_analyzers(analyzers):
+    # dense analyzers (no `keywords`) want every parsed record through feed()
+    # sparse analyzers declare bytes `keywords` + a bytes `pattern`: only lines
+    # containing a keyword reach the regex and the match goes to feed_match()
+    # => sparse: [(keywords, finder, match, feed_match), ...]
+    dense = []
+    sparse = []
+    for analyzer in analyzers:
+        keywords = getattr(analyzer, "keywords", None)
+        if keywords is None:
+            dense.append(analyzer)
+        else:
+            sparse.append((keywords, keyword_finder(keywords),
+                           analyzer.pattern.match, analyzer.feed_match))
+
+    return dense, sparse
+
+
+def bounded_lines(f, pos, end):
+    # lines of f that start before the byte offset end
+    for line in f:
+        if pos >= end:
+            return
+        pos += len(line)
+        yield line
+
+
+def instrument(dense, sparse):
+    # count matched lines (stats enabled only)
+    sparse = [(keywords, finder, stats.counting(match, "lines_matched"), feed_match)
+              for keywords, finder, match, feed_match in sparse]
+    return dense, sparse
+
+
+def run_range(file_path, analyzers, start=0, end=None):
+    with stats.timer("read+match"):
+        return scan_lines(file_path, analyzers, start, end)
+
+
+def scan_lines(file_path, analyzers, start=0, end=None):
+    # parse the lines of file_path that start inside the byte range [start, end)
+    # start must be 0 or the first byte after a newline
+    # (offsets of compressed files are offsets in the decompressed data)
+    dense, sparse = split_analyzers(analyzers)
+    if stats.ENABLED:
+        dense, sparse = instrument(dense, sparse)
+
+    # only sparse analyzers on a plain file => scan the memory-mapped file
+    if sparse and not dense and not is_compressed(file_path):
+        scan_range(file_path, sparse, start, end)
+        return analyzers
+
+    with open_log(file_path) as f:
+        if start:
+            f.seek(start)
+        lines = f if end is None else bounded_lines(f, start, end)
+        if stats.ENABLED:
+            lines = stats.counting_lines(lines)
+
+        # fast path: one sparse analyzer with one keyword (2_analyze.py, 3_cpu.py)
+        # => a substring check per line, nothing is decoded
+        if not dense and len(sparse) == 1 and len(sparse[0][0]) == 1:
+            (keyword,), finder, match, feed_match = sparse[0]
+            for line in lines:
+                if keyword in line:
+                    line_formate = match(line)
+                    if line_formate is not None:
+                        feed_match(line_formate)
+            return analyzers
+
+        for line in lines:
+            for keywords, finder, match, feed_match in sparse:
+                if finder.search(line) is not None:
+                    line_formate = match(line)
+                    if line_formate is not None:
+                        feed_match(line_formate)
+
+            if not dense:
+                continue
+
+            record = parse_line(line.decode("utf-8", errors="replace"))
+            if record is None:
+                continue
+            if stats.ENABLED:
+                stats.count("records_parsed")
+
+            for analyzer in dense:
+                analyzer.feed(record)
+
+    return analyzers
+
+
+def run(file_paths, analyzers):
+    # one pass over every file, no matter how many analyzers are registered
+    for file_path in file_paths:
+        run_range(file_path, analyzers)
+
+    return analyzers
@@ -0,0 +1,70 @@
+# Follow mode: tail the log directory and feed only the newly appended lines
+# to the analyzers, the flap windows stay in memory between polls
+# handles new files, deleted files and rotation (new inode / truncated file)
+# compressed archives (.log.gz ...) are finished rotations => not followed
+import os
+import time
+from modules.mod import list_log_files
+from modules.engine import run_range, complete_end
+
+# seconds between two looks at the directory => alerts within ~0.5s
+POLL_INTERVAL = 0.5
+
+
+def poll(parent_dir_path, analyzers, offsets, start_at_end=False):
+    # one look at the directory, offsets: file_path => (inode, offset)
+    # start_at_end: the files seen now are history, only what is appended
+    # later is parsed (files that show up afterwards are read from the start)
+    seen = set()
+
+    for file in list_log_files(parent_dir_path, (".log",)):
+        file_path = os.path.join(parent_dir_path, file)
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        seen.add(file_path)
+
+        if file_path in offsets:
+            inode, offset = offsets[file_path]
+        elif start_at_end:
+            # up to the last complete line: a half written one is read once finished
+            inode, offset = st.st_ino, complete_end(file_path, 0, st.st_size)
+        else:
+            inode, offset = st.st_ino, 0
+
+        # rotated (new file under the same name) or truncated => start over
+        if inode != st.st_ino or st.st_size < offset:
+            inode, offset = st.st_ino, 0
+
+        if st.st_size > offset:
+            end = complete_end(file_path, offset, st.st_size)
+            if end > offset:
+                run_range(file_path, analyzers, offset, end)
+                offset = end
+
+        offsets[file_path] = (inode, offset)
+
+    # forget files that were removed / renamed away
+    for file_path in list(offsets):
+        if file_path not in seen:
+            del offsets[file_path]
+
+
+def follow(parent_dir_path, analyzers, interval=POLL_INTERVAL):
+    # runs until Ctrl+C
+    for analyzer in analyzers:
+        if hasattr(analyzer, "start_live"):
+            analyzer.start_live()
+
+    offsets = {}
+    poll(parent_dir_path, analyzers, offsets, start_at_end=True)
+    print(f"## Following {parent_dir_path} (Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            time.sleep(interval)
+            poll(parent_dir_path, analyzers, offsets)
+    except KeyboardInterrupt:
+        pass
+
+    return analyzers
@@ -3,11 +3,44 @@
 import os
 import sys
 
-def get_log_files():
-    parent_dir_path = sys.argv[1]
+# plain logs + rotated archives (read with modules.engine.open_log)
+LOG_SUFFIXES = (".log", ".log.gz", ".log.bz2", ".log.xz")
+
+
+def list_log_files(parent_dir_path, suffixes=LOG_SUFFIXES):
     files = []
     for file in os.listdir(parent_dir_path):
-        if file.endswith(".log"):
+        if file.endswith(suffixes):
             files.append(file)
 
-    return parent_dir_path, files
+    return files
+
+
+def get_log_files():
+    parent_dir_path = sys.argv[1]
+    return parent_dir_path, list_log_files(parent_dir_path)
+
+
+def get_log_paths():
+    # same as get_log_files() but with full paths, ready for modules.engine.run()
+    parent_dir_path, files = get_log_files()
+    file_paths = []
+    for file in files:
+        file_paths.append(os.path.join(parent_dir_path, file))
+
+    return parent_dir_path, file_paths
+
+
+def get_workers():
+    # python 2_analyze.py ../ --workers 4   (default: 1 => sequential)
+    args = sys.argv[2:]
+    for i, arg in enumerate(args):
+        if arg in ("--workers", "-j") and i + 1 < len(args):
+            return int(args[i + 1])
+
+    return 1
+
+
+def has_flag(flag):
+    # python 2_analyze.py ../ --follow
+    return flag in sys.argv[2:]
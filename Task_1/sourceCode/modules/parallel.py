@@ -0,0 +1,90 @@
+# Parallel ingestion: log files (and byte-range chunks of big files) are spread
+# over a process pool, every worker fills its own copy of the analyzers and the
+# partial results are merged back in file/chunk order, so the output is the
+# same as a sequential modules.engine.run()
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from modules import stats
+from modules.engine import run, run_range, is_compressed
+
+# files bigger than this are split into several chunks
+CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def split_file(file_path, chunk_size=CHUNK_SIZE, start=0, size=None):
+    # => [(file_path, start, end), ...] with every chunk ending on a newline
+    # compressed files can't be entered in the middle => one chunk up to EOF
+    if is_compressed(file_path):
+        return [(file_path, start, None)]
+
+    if size is None:
+        size = os.path.getsize(file_path)
+    chunks = []
+
+    with open(file_path, "rb") as f:
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                # move the boundary to the first byte after the next newline
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+
+            chunks.append((file_path, start, end))
+            start = end
+
+    return chunks
+
+
+def run_chunk(chunk, blank_analyzers, stats_enabled=False):
+    # worker side: analyzers arrive empty (pickled) and go back filled
+    file_path, start, end = chunk
+    analyzers = pickle.loads(blank_analyzers)
+
+    if not stats_enabled:
+        return run_range(file_path, analyzers, start, end), None
+
+    # the stats of this chunk only, merged by the parent
+    stats.ENABLED = True
+    stats.reset()
+    run_range(file_path, analyzers, start, end)
+    return analyzers, stats.snapshot()
+
+
+def map_chunks(chunks, analyzers, workers=1):
+    # => one list of filled copies of `analyzers` per chunk, in chunk order
+    # snapshot the empty analyzers now: the pool pickles its arguments lazily,
+    # after the caller may already have merged the first partial results
+    blank_analyzers = pickle.dumps(analyzers)
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield run_chunk(chunk, blank_analyzers)[0]
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() keeps the chunk order => merge order == sequential order
+        results = pool.map(run_chunk, chunks, [blank_analyzers] * len(chunks),
+                           [stats.ENABLED] * len(chunks))
+        for analyzers, chunk_stats in results:
+            if chunk_stats is not None:
+                stats.merge(chunk_stats)
+            yield analyzers
+
+
+def run_parallel(file_paths, analyzers, workers=1, chunk_size=CHUNK_SIZE):
+    if workers <= 1:
+        return run(file_paths, analyzers)
+
+    chunks = []
+    for file_path in file_paths:
+        chunks.extend(split_file(file_path, chunk_size))
+
+    for partial in map_chunks(chunks, analyzers, workers):
+        for analyzer, part in zip(analyzers, partial):
+            analyzer.merge(part)
+
+    return analyzers
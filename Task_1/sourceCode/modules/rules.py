@@ -0,0 +1,119 @@
+# Declarative flap rules (rules.json) evaluated in one pass
+#
+# a rule: {
+#   "name": "BGP flap",
+#   "keyword": "BGP neighbor",               cheap prefilter (bytes substring)
+#   "pattern": "BGP neighbor (?P<neighbor>\S+) went down",   regex on the event text
+#   "template": "BGP neighbor <IP:neighbor> went down",    or: event template
+#                                            (modules.template), instead of "pattern"
+#   "level": "INFO",                         optional
+#   "where": {"value": 81},                  optional: numeric field >= minimum
+#   "key": ["neighbor"],                     optional: one window per device + these fields
+#   "window": 600, "threshold": 3,           >= threshold matches within window seconds
+#   "severity": "High"
+# }
+#
+# all rules are compiled into ONE regex: the common line header followed by an
+# alternation with one named group per rule (the rule's level + its pattern),
+# m.lastgroup tells which rule matched => 100 rules cost about one regex match
+# per candidate line. When two rules match the same line the first one in the
+# file wins; if its "where" check fails, the later rules get the line
+import re
+import json
+from modules.analyzers import FlapAnalyzer
+from modules.template import template_pattern
+
+RULE_KEYS = ("name", "keyword", "window", "threshold", "severity")
+
+# the level is part of each rule's alternative (see compile_rules)
+LINE_HEADER = (
+    rb"\s*(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+"
+    rb"(?P<device>\S+)\s+"
+)
+
+# "(?P<neighbor>" => "(?P<r0_neighbor>", "(?P=neighbor)" => "(?P=r0_neighbor)"
+GROUP_NAME_REGEX = re.compile(r"\(\?P([<=])(\w+)")
+
+
+def load_rules(rules_path):
+    with open(rules_path) as f:
+        rules = json.load(f)
+
+    for rule in rules:
+        missing = [key for key in RULE_KEYS if key not in rule]
+        if missing:
+            raise ValueError(f"rule {rule.get('name', '?')!r} is missing: {', '.join(missing)}")
+        if ("pattern" in rule) == ("template" in rule):
+            raise ValueError(f"rule {rule.get('name', '?')!r} needs either a pattern or a template")
+
+    return rules
+
+
+def compile_rules(rules, start=0):
+    # => one bytes regex for the rules from `start` on, groups keep the rule index
+    alternatives = []
+    for i, rule in enumerate(rules):
+        if i < start:
+            continue
+        if "template" in rule:
+            pattern = template_pattern(rule["template"])
+        else:
+            pattern = rule["pattern"]
+        pattern = GROUP_NAME_REGEX.sub(lambda m: f"(?P{m.group(1)}r{i}_{m.group(2)}", pattern)
+        re.compile(pattern)  # fail early with the rule's own pattern in the error
+        level = re.escape(rule["level"]) if "level" in rule else r"\S+"
+        alternatives.append(f"(?P<r{i}>(?P<r{i}_level>{level})\\s+{pattern})".encode())
+
+    return re.compile(LINE_HEADER + b"(?:" + b"|".join(alternatives) + b")")
+
+
+class RuleFlapAnalyzer(FlapAnalyzer):
+    # the flap windows of one rule
+    def __init__(self, rule):
+        super().__init__(rule["window"], rule["threshold"])
+        self.label = f"{rule['name']} [{rule['severity']}]"
+
+
+class RuleAnalyzer:
+    # sparse analyzer (see modules.engine) evaluating every rule in one match
+    def __init__(self, rules):
+        self.rules = rules
+        self.keywords = tuple(dict.fromkeys(rule["keyword"].encode() for rule in rules))
+        self.pattern = compile_rules(rules)
+        # a rule with a "where" check: the later rules, tried when the check fails
+        self.fallbacks = {i: compile_rules(rules, i + 1) for i, rule in enumerate(rules)
+                          if "where" in rule and i + 1 < len(rules)}
+        self.flaps = [RuleFlapAnalyzer(rule) for rule in rules]
+
+    def feed_match(self, line_formate):
+        group = line_formate.lastgroup           # "r3"
+        i = int(group[1:])
+        rule = self.rules[i]
+
+        for field, minimum in rule.get("where", {}).items():
+            if float(line_formate.group(f"{group}_{field}")) < minimum:
+                if i in self.fallbacks:
+                    # same line: the scanner matches inside the mapped file
+                    line_formate = self.fallbacks[i].match(
+                        line_formate.string, line_formate.pos, line_formate.endpos)
+                    if line_formate:
+                        self.feed_match(line_formate)
+                return
+
+        key = line_formate.group("device").decode()
+        for field in rule.get("key", []):
+            key += " " + line_formate.group(f"{group}_{field}").decode()
+
+        self.flaps[i].add(key, line_formate.group("timestamp").decode())
+
+    def start_live(self):
+        for flap in self.flaps:
+            flap.start_live()
+
+    def merge(self, other):
+        for flap, part in zip(self.flaps, other.flaps):
+            flap.merge(part)
+
+    def report(self):
+        for flap in self.flaps:
+            flap.report()
@@ -0,0 +1,85 @@
+# Memory-mapped scanner for sparse analyzers (modules.engine.split_analyzers)
+# the file is mapped instead of read: keywords are searched and the bytes
+# patterns are matched directly on the mapped buffer, no line objects are
+# created and only the groups an analyzer asks for get decoded
+# pages behind the scan position are released, so RSS stays flat
+import os
+import re
+import mmap
+from modules import stats
+
+# release the pages already scanned every RELEASE_EVERY bytes
+RELEASE_EVERY = 64 * 1024 * 1024
+
+
+def make_finder(sparse):
+    # => find(buffer, pos, end) returning the offset of the next keyword or -1
+    keywords = []
+    for analyzer_keywords, analyzer_finder, match, feed_match in sparse:
+        keywords.extend(analyzer_keywords)
+
+    if len(keywords) == 1:
+        keyword = keywords[0]
+        return lambda buffer, pos, end: buffer.find(keyword, pos, end)
+
+    finder = re.compile(b"|".join(re.escape(keyword) for keyword in keywords))
+
+    def find(buffer, pos, end):
+        hit = finder.search(buffer, pos, end)
+        return -1 if hit is None else hit.start()
+
+    return find
+
+
+def release(mm, start, end):
+    # drop the (clean, file backed) pages of [start, end) from memory
+    if not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    start -= start % mmap.PAGESIZE
+    end -= end % mmap.PAGESIZE
+    if end > start:
+        mm.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+def scan_range(file_path, sparse, start=0, end=None):
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if end is None or end > size:
+            end = size
+        if start >= end:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            if stats.ENABLED:
+                stats.count("bytes_scanned", end - start)
+
+            find = make_finder(sparse)
+            released = start
+            pos = start
+
+            while pos < end:
+                hit = find(mm, pos, end)
+                if hit == -1:
+                    break
+
+                # bounds of the line that contains the keyword
+                line_start = max(pos, mm.rfind(b"\n", pos, hit) + 1)
+                line_end = mm.find(b"\n", hit, end)
+                line_end = end if line_end == -1 else line_end + 1
+
+                for keywords, finder, match, feed_match in sparse:
+                    if finder.search(mm, line_start, line_end) is not None:
+                        line_formate = match(mm, line_start, line_end)
+                        if line_formate is not None:
+                            feed_match(line_formate)
+
+                if stats.ENABLED:
+                    stats.count("candidate_lines")
+
+                pos = line_end
+                if pos - released >= RELEASE_EVERY:
+                    release(mm, released, pos)
+                    released = pos
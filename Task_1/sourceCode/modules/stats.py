@@ -0,0 +1,110 @@
+# Pipeline instrumentation: per-stage counters and timers
+# python 2_analyze.py ../ --stats     (or LOG_STATS=1) => JSON summary on stderr
+# python 2_analyze.py ../ --profile   => cProfile of the whole run on stderr
+# when disabled every hook is one `if stats.ENABLED` per file range, not per line
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+from contextlib import contextmanager
+
+ENABLED = False
+
+counters = {}
+timers = {}
+
+
+def count(name, n=1):
+    counters[name] = counters.get(name, 0) + n
+
+
+@contextmanager
+def timer(name):
+    if not ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timers[name] = timers.get(name, 0.0) + time.perf_counter() - start
+
+
+def snapshot():
+    return {"counters": dict(counters), "timers": dict(timers)}
+
+
+def reset():
+    counters.clear()
+    timers.clear()
+
+
+def merge(part):
+    # counters / timers of a worker process (modules.parallel)
+    for name, n in part["counters"].items():
+        count(name, n)
+    for name, seconds in part["timers"].items():
+        timers["workers." + name] = timers.get("workers." + name, 0.0) + seconds
+
+
+def counting_lines(lines):
+    # wraps a line iterator, only used when ENABLED
+    n = 0
+    size = 0
+    try:
+        for line in lines:
+            n += 1
+            size += len(line)
+            yield line
+    finally:
+        count("lines_read", n)
+        count("bytes_read", size)
+
+
+def counting(func, name):
+    # wraps a callable (regex match / feed), only used when ENABLED
+    def wrapper(*args):
+        result = func(*args)
+        if result is not None:
+            count(name)
+        return result
+    return wrapper
+
+
+def summary(script, seconds):
+    result = {"script": script, "seconds": round(seconds, 6)}
+    result.update(snapshot())
+
+    # derived rates (with --workers: per second of worker time)
+    read_seconds = timers.get("read+match") or timers.get("workers.read+match", 0.0)
+    if read_seconds:
+        for name in ("lines_read", "bytes_read", "bytes_scanned"):
+            if name in counters:
+                result.setdefault("rates", {})[name + "_per_sec"] = round(counters[name] / read_seconds)
+    return result
+
+
+@contextmanager
+def session(script):
+    # around the whole run of a script
+    global ENABLED
+    args = sys.argv[1:]
+    ENABLED = "--stats" in args or os.environ.get("LOG_STATS") == "1"
+    profiler = cProfile.Profile() if "--profile" in args else None
+
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+
+        if ENABLED:
+            sys.stdout.flush()
+            print(json.dumps(summary(script, time.perf_counter() - start)), file=sys.stderr)
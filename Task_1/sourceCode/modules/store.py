@@ -0,0 +1,215 @@
+# Columnar event store for 1_extract_info.py
+# python 1_extract_info.py ../ --ingest  => <logs>/logstore/
+#
+# every block of BLOCK_SIZE records is one file with 4 columns:
+#   ts     array('q')  epoch seconds
+#   device array('I')  code in dictionary["devices"]
+#   level  array('B')  code in dictionary["levels"]
+#   event  array('I')  code in dictionary["events"]
+# meta.json keeps the time range of every block (time index), the blocks of
+# every device (device index) and where each column starts inside the block,
+# so a query only reads the columns of the blocks it needs
+# it also keeps the size / mtime of every ingested log: once a log changes the
+# store is stale (is_fresh()) and the logs are scanned instead
+import os
+import json
+from array import array
+from modules.engine import to_epoch, format_epoch
+
+STORE_DIR = "logstore"
+BLOCK_SIZE = 65536
+
+COLUMN_TYPES = {"ts": "q", "device": "I", "level": "B", "event": "I"}
+
+# files a store directory may hold (plus the block_*.bin files)
+STORE_FILES = ("meta.json", "dictionary.json")
+
+
+def is_store_file(name):
+    return name in STORE_FILES or (name.startswith("block_") and name.endswith(".bin"))
+
+
+def source_stats(file_paths):
+    # log path => [size, mtime_ns]
+    sources = {}
+    for path in file_paths:
+        st = os.stat(path)
+        sources[os.path.abspath(path)] = [st.st_size, st.st_mtime_ns]
+    return sources
+
+
+def is_fresh(store_dir, file_paths):
+    # the store was built from exactly these logs and none of them changed since
+    meta_path = os.path.join(store_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path) as f:
+        sources = json.load(f).get("sources")
+    try:
+        return sources == source_stats(file_paths)
+    except FileNotFoundError:
+        return False
+
+
+def parse_time(text):
+    # "2025-10-19" / "2025-10-19 06:00" / "2025-10-19 06:00:00" => epoch seconds
+    # the missing part is filled from "2000-01-01 00:00:00"
+    text = text.strip()
+    return to_epoch(text + "2000-01-01 00:00:00"[len(text):])
+
+
+class StoreWriter:
+    # dense analyzer: fed by modules.engine.run() with file_paths, report() writes
+    # the last block + meta
+    def __init__(self, store_dir, file_paths, block_size=BLOCK_SIZE):
+        self.store_dir = store_dir
+        self.block_size = block_size
+        self.codes = {"devices": {}, "levels": {}, "events": {}}
+        self.blocks = []
+        self.device_blocks = {}
+        self.new_block()
+
+        # the old store goes, anything else in the directory (the logs themselves
+        # with --store ../) is never touched: such a directory is refused
+        os.makedirs(store_dir, exist_ok=True)
+        others = [file for file in os.listdir(store_dir) if not is_store_file(file)]
+        if others:
+            raise ValueError(f"{store_dir} is not a store directory (it holds {', '.join(sorted(others)[:3])}"
+                             f"{', ...' if len(others) > 3 else ''})")
+        for file in os.listdir(store_dir):
+            os.remove(os.path.join(store_dir, file))
+
+        # taken before reading: a log appended during the ingest makes the store stale
+        self.sources = source_stats(file_paths)
+
+    def new_block(self):
+        self.columns = {name: array(typecode) for name, typecode in COLUMN_TYPES.items()}
+
+    def code(self, kind, value):
+        codes = self.codes[kind]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+
+    def feed(self, record):
+        timestamp, device, level, event = record
+        columns = self.columns
+        columns["ts"].append(to_epoch(timestamp))
+        columns["device"].append(self.code("devices", device))
+        columns["level"].append(self.code("levels", level))
+        columns["event"].append(self.code("events", event))
+
+        if len(columns["ts"]) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        columns = self.columns
+        if not columns["ts"]:
+            return
+
+        block_id = len(self.blocks)
+        file = f"block_{block_id:05d}.bin"
+        offsets = {}
+        with open(os.path.join(self.store_dir, file), "wb") as f:
+            for name, column in columns.items():
+                start = f.tell()
+                column.tofile(f)
+                offsets[name] = [start, f.tell() - start]
+
+        for device_code in set(columns["device"]):
+            self.device_blocks.setdefault(device_code, []).append(block_id)
+
+        self.blocks.append({
+            "file": file,
+            "rows": len(columns["ts"]),
+            "min_ts": min(columns["ts"]),
+            "max_ts": max(columns["ts"]),
+            "columns": offsets,
+        })
+        self.new_block()
+
+    def report(self):
+        self.flush()
+
+        dictionary = {kind: list(codes) for kind, codes in self.codes.items()}
+        with open(os.path.join(self.store_dir, "dictionary.json"), "w") as f:
+            json.dump(dictionary, f)
+
+        with open(os.path.join(self.store_dir, "meta.json"), "w") as f:
+            json.dump({
+                "blocks": self.blocks,
+                "device_blocks": {str(code): ids for code, ids in self.device_blocks.items()},
+                "sources": self.sources,
+            }, f)
+
+        rows = sum(block["rows"] for block in self.blocks)
+        print(f"## {rows} records in {len(self.blocks)} block(s) written to {self.store_dir}")
+
+
+def read_column(f, block, name):
+    start, length = block["columns"][name]
+    f.seek(start)
+    column = array(COLUMN_TYPES[name])
+    column.frombytes(f.read(length))
+    return column
+
+
+def query(store_dir, device=None, level=None, since=None, until=None):
+    # yields (timestamp, device, level, event) records, since/until are epoch seconds
+    with open(os.path.join(store_dir, "meta.json")) as f:
+        meta = json.load(f)
+    with open(os.path.join(store_dir, "dictionary.json")) as f:
+        dictionary = json.load(f)
+
+    devices = dictionary["devices"]
+    levels = dictionary["levels"]
+    events = dictionary["events"]
+
+    # unknown device / level => nothing to read at all
+    device_code = level_code = None
+    if device is not None:
+        if device not in devices:
+            return
+        device_code = devices.index(device)
+    if level is not None:
+        if level not in levels:
+            return
+        level_code = levels.index(level)
+
+    # per-device index + time index => candidate blocks
+    if device_code is not None:
+        block_ids = meta["device_blocks"].get(str(device_code), [])
+    else:
+        block_ids = range(len(meta["blocks"]))
+
+    for block_id in block_ids:
+        block = meta["blocks"][block_id]
+        if since is not None and block["max_ts"] < since:
+            continue
+        if until is not None and block["min_ts"] >= until:
+            continue
+
+        with open(os.path.join(store_dir, block["file"]), "rb") as f:
+            ts = read_column(f, block, "ts")
+            rows = range(len(ts))
+            if since is not None or until is not None:
+                rows = [i for i in rows
+                        if (since is None or ts[i] >= since)
+                        and (until is None or ts[i] < until)]
+
+            device_column = read_column(f, block, "device")
+            if device_code is not None:
+                rows = [i for i in rows if device_column[i] == device_code]
+
+            level_column = read_column(f, block, "level")
+            if level_code is not None:
+                rows = [i for i in rows if level_column[i] == level_code]
+
+            if not rows:
+                continue
+
+            event_column = read_column(f, block, "event")
+            for i in rows:
+                yield (format_epoch(ts[i]), devices[device_column[i]],
+                       levels[level_column[i]], events[event_column[i]])
@@ -0,0 +1,73 @@
+# Event templates: the variable tokens of an event (IPs, interface names, numbers)
+# are masked so that events of the same kind share one template
+#
+# "BGP neighbor 10.0.0.1 went down"         => "BGP neighbor <IP> went down", ("10.0.0.1",)
+# "Interface GigabitEthernet0/3 changed state to up"
+#                                            => "Interface <IF> changed state to up", ("GigabitEthernet0/3",)
+# "CPU utilization exceeded 85%"            => "CPU utilization exceeded <NUM>%", ("85",)
+#
+# templates also work as rule patterns (modules.rules): "<IP:neighbor>" captures
+# the IP as the field "neighbor"
+import re
+
+# one pattern per placeholder, tried in this order
+TOKEN_PATTERNS = {
+    "IP": (r"\d{1,3}(?:\.\d{1,3}){3}(?:/\d{1,2})?"
+           r"|[0-9A-Fa-f:]*::[0-9A-Fa-f:]*(?:/\d{1,3})?"
+           r"|(?:[0-9A-Fa-f]{1,4}:){7}[0-9A-Fa-f]{1,4}(?:/\d{1,3})?"),
+    # GigabitEthernet0/3, Gi0/0/1.100, ge-0/0/0.0, Loopback0, Vlan10, eth0, lo0.0
+    "IF": (r"[A-Za-z][A-Za-z-]*\d+(?:/\d+)+(?:[.:]\d+)?"
+           r"|(?:Loopback|Vlan|Port-channel|Tunnel|eth|lo|ae|irb|vlan)\d+(?:\.\d+)?"),
+    "NUM": r"0x[0-9A-Fa-f]+|\d+(?:\.\d+)?",
+}
+
+TOKEN_REGEX = re.compile(
+    r"(?<![\w./-])(?:"
+    + "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in TOKEN_PATTERNS.items())
+    + r")(?![\w/-]|\.\d)"
+)
+
+# "<IP>" or "<IP:neighbor>" inside a template
+PLACEHOLDER_REGEX = re.compile(r"<(" + "|".join(TOKEN_PATTERNS) + r")(?::(\w+))?>")
+
+# raw event => (template, params), the same few event texts repeat all day long
+# (cleared when full so a flood of distinct values cannot eat the memory)
+CACHE_SIZE = 100000
+_cache = {}
+
+
+def extract(event):
+    # => ("BGP neighbor <IP> went down", ("10.0.0.1",))
+    cached = _cache.get(event)
+    if cached is not None:
+        return cached
+
+    params = []
+
+    def mask(token):
+        params.append(token.group())
+        return f"<{token.lastgroup}>"
+
+    cached = (TOKEN_REGEX.sub(mask, event), tuple(params))
+    if len(_cache) >= CACHE_SIZE:
+        _cache.clear()
+    _cache[event] = cached
+    return cached
+
+
+def template_pattern(template):
+    # "BGP neighbor <IP:neighbor> went down" => regex (str) matching the whole event
+    # named placeholders become named groups, spaces match any run of whitespace
+    parts = []
+    pos = 0
+    for placeholder in PLACEHOLDER_REGEX.finditer(template):
+        parts.append(re.escape(template[pos:placeholder.start()]))
+        kind, name = placeholder.groups()
+        if name:
+            parts.append(f"(?P<{name}>{TOKEN_PATTERNS[kind]})")
+        else:
+            parts.append(f"(?:{TOKEN_PATTERNS[kind]})")
+        pos = placeholder.end()
+    parts.append(re.escape(template[pos:]))
+
+    return "".join(parts).replace(r"\ ", r"\s+") + r"\s*$"
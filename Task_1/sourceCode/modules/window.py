@@ -0,0 +1,61 @@
+# Sliding-window flap detection (two pointers / deque)
+# a flap = `threshold` or more events of one device within `window` time units
+# every event enters and leaves the deque once => linear time
+from bisect import insort
+from collections import deque
+
+
+class FlapWindow:
+    # events are expected in time order; a late one (two files appended in the
+    # same poll) is put in its place if it is still inside the window of the
+    # newest event, and dropped if it is older than that
+    def __init__(self, window, threshold):
+        self.window = window
+        self.threshold = threshold
+        self.times = deque()
+        self.episodes = []   # [start, end, peak_count]
+
+    def add(self, t):
+        # returns the new episode when t opens one, else None
+        times = self.times
+        if times and t < times[-1]:
+            newest = times[-1]
+            if newest - t > self.window:
+                return None
+            insort(times, t)
+            t = newest
+        else:
+            times.append(t)
+
+        # drop events that fell out of the window [t - window, t]
+        while t - times[0] > self.window:
+            times.popleft()
+
+        count = len(times)
+        if count < self.threshold:
+            return None
+
+        # the window still overlaps the running episode => extend it
+        if self.episodes and times[0] <= self.episodes[-1][1]:
+            episode = self.episodes[-1]
+            episode[1] = t
+            if count > episode[2]:
+                episode[2] = count
+            return None
+
+        episode = [times[0], t, count]
+        self.episodes.append(episode)
+        return episode
+
+
+def detect_flaps(times, window, threshold):
+    # sorted times => [(start, end, peak_count), ...], one entry per flap episode
+    """
+    Example:
+    detect_flaps([412, 415, 419, 500], window=10, threshold=3) => [(412, 419, 3)]
+    """
+    flap_window = FlapWindow(window, threshold)
+    for t in times:
+        flap_window.add(t)
+
+    return [tuple(episode) for episode in flap_window.episodes]
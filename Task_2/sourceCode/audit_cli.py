@@ -0,0 +1,155 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from parsers import config_hash, parse_config
+from validations import apply_validations
+import db
+
+# Audit a directory of configs without the web server
+# python audit_cli.py ../                                  => saved to the database like /upload
+# python audit_cli.py ../ --format json --output audit.json
+# python audit_cli.py ../ --format csv --output audit.csv --workers 8
+# python audit_cli.py /srv/configs --recursive        => sub directories too
+# the throughput summary goes to stderr
+
+CSV_COLUMNS = ["source", "hostname", "vendor", "interfaces", "protocols", "ospf_areas",
+               "bgp_asn", "has_loopback", "issues"]
+
+
+def list_configs(config_dir, recursive=False):
+    # => (path, source name) of the regular files of the directory, hidden files /
+    # directories skipped; recursive: sub directories too, named "site1/R1.cfg"
+    configs = []
+    for root, dirs, files in os.walk(config_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".")) if recursive else []
+        for name in sorted(files):
+            if not name.startswith("."):
+                path = os.path.join(root, name)
+                configs.append((path, os.path.relpath(path, config_dir)))
+    return configs
+
+
+def parse_file(config):
+    # runs in a worker process => (size in bytes, parsed device)
+    path, source = config
+    with open(path, "rb") as f:
+        data = f.read()
+    filename = os.path.basename(path)
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="ignore")
+    dev = parse_config(filename, lines)
+    dev["source"] = source
+    dev["config_hash"] = config_hash(source, data)
+    return len(data), dev
+
+
+def parse_all(configs, workers):
+    # => (bytes read, devices) in file order, files handed out in chunks so a
+    # worker round trip is not paid per file
+    if workers <= 1:
+        results = [parse_file(config) for config in configs]
+    else:
+        chunksize = max(1, min(100, len(configs) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(parse_file, configs, chunksize=chunksize))
+
+    return sum(size for size, dev in results), [dev for size, dev in results]
+
+
+def device_record(dev):
+    # parsed + validated device => JSON-friendly dict
+    return {
+        "source": dev["source"],
+        "hostname": dev["hostname"],
+        "vendor": dev["vendor"],
+        "interfaces": dev["interfaces"],
+        "protocols": sorted(dev["protocols"]),
+        "ospf_areas": sorted(dev["ospf_areas"]),
+        "bgp_asn": dev["bgp_asn"],
+        "acls": dev["acls"],
+        "has_loopback": dev["has_loopback"],
+        "issues": dev["issues"],
+    }
+
+
+def write_json(devices, out):
+    json.dump([device_record(dev) for dev in devices], out, indent=2)
+    out.write("\n")
+
+
+def write_csv(devices, out):
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for dev in devices:
+        writer.writerow([
+            dev["source"],
+            dev["hostname"] or "UNKNOWN",
+            dev["vendor"],
+            len(dev["interfaces"]),
+            ", ".join(sorted(dev["protocols"])),
+            ", ".join(str(area) for area in sorted(dev["ospf_areas"])),
+            dev["bgp_asn"] or "",
+            1 if dev["has_loopback"] else 0,
+            "; ".join(dev["issues"]),
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit a directory of device configs")
+    parser.add_argument("config_dir")
+    parser.add_argument("--recursive", "-r", action="store_true", help="include sub directories")
+    parser.add_argument("--format", choices=["db", "json", "csv"], default="db",
+                        help="db: save to the database (default), json / csv: write a report")
+    parser.add_argument("--output", help="json / csv output file (default: stdout)")
+    parser.add_argument("--db", help=f"database file (default: {db.DB_PATH})")
+    parser.add_argument("--workers", "-j", type=int, default=os.cpu_count() or 1,
+                        help="parser processes (default: all cores)")
+    args = parser.parse_args()
+
+    configs = list_configs(args.config_dir, args.recursive)
+    started = time.perf_counter()
+    size, devices = parse_all(configs, args.workers)
+    parse_time = time.perf_counter() - started
+    stages = [("parse", parse_time)]
+
+    if args.format == "db":
+        # the database layer validates against the whole saved fleet while saving
+        if args.db:
+            db.DB_PATH = args.db
+        db.init_db()
+        t = time.perf_counter()
+        saved = db.save_devices_to_db(devices)
+        stages.append(("validate+save", time.perf_counter() - t))
+        result = f"{saved} device(s) saved to {db.DB_PATH} ({len(devices) - saved} unchanged)"
+    else:
+        t = time.perf_counter()
+        apply_validations(devices)
+        stages.append(("validate", time.perf_counter() - t))
+
+        t = time.perf_counter()
+        write = write_json if args.format == "json" else write_csv
+        if args.output:
+            with open(args.output, "w", newline="") as out:
+                write(devices, out)
+        else:
+            write(devices, sys.stdout)
+        stages.append(("write", time.perf_counter() - t))
+        with_issues = sum(1 for dev in devices if dev["issues"])
+        result = f"{len(devices)} device(s), {with_issues} with issues => {args.output or 'stdout'}"
+
+    total = time.perf_counter() - started
+    parse_time = parse_time or 1e-9
+    print(f"## {len(configs)} config(s), {size / 1e6:.1f} MB, {args.workers} worker(s): "
+          f"{len(configs) / parse_time:.0f} configs/s, {size / 1e6 / parse_time:.1f} MB/s parsed",
+          file=sys.stderr)
+    print("## " + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in stages)
+          + f", total {total:.2f} s ({len(configs) / (total or 1e-9):.0f} configs/s)", file=sys.stderr)
+    print(f"## {result}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
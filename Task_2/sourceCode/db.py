@@ -0,0 +1,657 @@
+# SQLite persistence of the audit: schema, bulk upserts and the cross-device
+# checks kept up to date on every save (see save_devices_to_db)
+import re
+import socket
+import sqlite3
+import threading
+import ipaddress
+from validations import (
+    MISSING_LOOPBACK, OSPF_INCONSISTENT, BGP_INCONSISTENT, has_loopback, overlapping_pairs,
+)
+
+DB_PATH = "network_audit.db"
+
+# rows per IN (...) lookup (old SQLite builds allow 999 parameters per statement)
+BATCH_SIZE = 500
+
+# when more than this share of the fleet changes in one save, the cross-device
+# checks are redone for the whole fleet in memory (one sweep over all subnets)
+# instead of index lookups per changed device
+FULL_RECHECK_SHARE = 0.1
+
+# canonical "a.b.c.d/len" (no leading zeros), anything else goes through ipaddress
+OCTET = r"(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+IPV4_CIDR_REGEX = re.compile(rf"{OCTET}\.{OCTET}\.{OCTET}\.{OCTET}/(3[0-2]|[12]?\d)")
+
+
+# dashboard columns that can be sorted on => SQL
+DASHBOARD_SORTS = {
+    "hostname": "d.hostname",
+    "vendor": "d.vendor",
+    "loopback": "d.has_loopback",
+    "interfaces": "if_count",
+    "issues": "d.issues",
+}
+
+# (filters, sort, page) => (generation, (rows, total)), an entry is stale once the
+# generation saved in the database moved on (any save, from any process)
+DASHBOARD_CACHE_SIZE = 256
+_dashboard_cache = {}
+_cache_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_db():
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    # WAL (set in init_db) + NORMAL: one fsync per checkpoint instead of per commit
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA cache_size = -65536")  # 64 MB
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def read_db():
+    # one reading connection per thread, kept open between requests
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = get_db()
+    return conn
+
+
+def table_columns(cur, table):
+    return {row["name"] for row in cur.execute(f"PRAGMA table_info({table})")}
+
+
+def init_db():
+    conn = get_db()
+    cur = conn.cursor()
+
+    # readers (dashboard) do not block the writer (uploads) and the other way round
+    cur.execute("PRAGMA journal_mode = WAL")
+
+    # device_key: hostname (or file name when there is none), one row per device
+    # config_hash: sha256 of the uploaded file => unchanged uploads are skipped
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS devices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hostname TEXT,
+            vendor TEXT,
+            has_loopback INTEGER,
+            issues TEXT,
+            device_key TEXT,
+            config_hash TEXT,
+            bgp_asn INTEGER
+        )
+    """)
+
+    # network / broadcast address of the subnet (the index of the overlap check):
+    # ip4_start / ip4_end as integers, ip6_start / ip6_end as 32 hex digits
+    # (text order is numeric order, 128-bit values do not fit an INTEGER)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS interfaces (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            device_id INTEGER,
+            name TEXT,
+            ip_cidr TEXT,
+            ip_version INTEGER,
+            ip4_start INTEGER,
+            ip4_end INTEGER,
+            ip6_start TEXT,
+            ip6_end TEXT,
+            FOREIGN KEY(device_id) REFERENCES devices(id)
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS protocols (
+            device_id INTEGER,
+            name TEXT,
+            FOREIGN KEY(device_id) REFERENCES devices(id)
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ospf_areas (
+            device_id INTEGER,
+            area INTEGER,
+            FOREIGN KEY(device_id) REFERENCES devices(id)
+        )
+    """)
+
+    # generation: bumped by every save, in the same transaction
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS db_state (
+            name TEXT PRIMARY KEY,
+            value INTEGER
+        )
+    """)
+
+    migrate(cur)
+    bump_generation(cur)
+
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_devices_key ON devices(device_key)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_devices_hostname ON devices(hostname)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_devices_hash ON devices(config_hash)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_devices_asn ON devices(bgp_asn)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_interfaces_device ON interfaces(device_id)")
+    # partial: each version's column is NULL on the rows of the other one
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_interfaces_subnet4 ON interfaces(ip4_start) WHERE ip4_start IS NOT NULL")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_interfaces_subnet6 ON interfaces(ip6_start) WHERE ip6_start IS NOT NULL")
+    # (device_id, name): the protocols of a device come out sorted by name
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_protocols_device ON protocols(device_id, name)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_protocols_name ON protocols(name)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ospf_areas_device ON ospf_areas(device_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ospf_areas_area ON ospf_areas(area)")
+
+    conn.commit()
+    conn.close()
+
+
+def migrate(cur):
+    # databases written by older versions of the app
+    columns = table_columns(cur, "devices")
+    for column, column_type in (("device_key", "TEXT"), ("config_hash", "TEXT"), ("bgp_asn", "INTEGER")):
+        if column not in columns:
+            cur.execute(f"ALTER TABLE devices ADD COLUMN {column} {column_type}")
+
+    # routing_protocols text column => protocols table
+    if "routing_protocols" in columns:
+        rows = cur.execute(
+            "SELECT id, routing_protocols FROM devices "
+            "WHERE id NOT IN (SELECT device_id FROM protocols)"
+        ).fetchall()
+        cur.executemany(
+            "INSERT INTO protocols (device_id, name) VALUES (?, ?)",
+            [(row["id"], name) for row in rows
+             for name in sorted(filter(None, (row["routing_protocols"] or "").split(",")))],
+        )
+
+    interface_columns = table_columns(cur, "interfaces")
+    if "ip4_start" not in interface_columns:
+        if "ip_start" in interface_columns:
+            # hex ip_start / ip_end for both versions => IPv6 columns, IPv4 moved to integers
+            cur.execute("DROP INDEX IF EXISTS idx_interfaces_subnet")
+            cur.execute("ALTER TABLE interfaces RENAME COLUMN ip_start TO ip6_start")
+            cur.execute("ALTER TABLE interfaces RENAME COLUMN ip_end TO ip6_end")
+            for column in ("ip4_start", "ip4_end"):
+                cur.execute(f"ALTER TABLE interfaces ADD COLUMN {column} INTEGER")
+            rows = cur.execute("SELECT id, ip6_start, ip6_end FROM interfaces WHERE ip_version = 4").fetchall()
+            cur.executemany(
+                "UPDATE interfaces SET ip4_start = ?, ip4_end = ?, ip6_start = NULL, ip6_end = NULL WHERE id = ?",
+                [(int(row["ip6_start"], 16), int(row["ip6_end"], 16), row["id"]) for row in rows],
+            )
+        else:
+            # separate subnets table => subnet columns of interfaces
+            for column, column_type in (("ip_version", "INTEGER"), ("ip4_start", "INTEGER"), ("ip4_end", "INTEGER"),
+                                        ("ip6_start", "TEXT"), ("ip6_end", "TEXT")):
+                cur.execute(f"ALTER TABLE interfaces ADD COLUMN {column} {column_type}")
+            rows = cur.execute("SELECT id, ip_cidr FROM interfaces WHERE ip_cidr IS NOT NULL").fetchall()
+            cur.executemany(
+                "UPDATE interfaces SET ip_version = ?, ip4_start = ?, ip4_end = ?, ip6_start = ?, ip6_end = ? "
+                "WHERE id = ?",
+                [interface_subnet(row["ip_cidr"])[1:] + (row["id"],) for row in rows],
+            )
+    cur.execute("DROP TABLE IF EXISTS subnets")
+
+    # rows saved by the old delete-everything path have no device_key: the hostname,
+    # or "<hostname> (<id>)" / "UNKNOWN (<id>)" for duplicate / missing names so the
+    # unique index can be built (newest row first: it keeps the plain hostname)
+    rows = cur.execute("SELECT id, hostname FROM devices WHERE device_key IS NULL ORDER BY id DESC").fetchall()
+    if rows:
+        taken = {row[0] for row in cur.execute("SELECT device_key FROM devices WHERE device_key IS NOT NULL")}
+        keys = []
+        for row in rows:
+            hostname = row["hostname"]
+            if not hostname or hostname == "UNKNOWN":
+                key = f"UNKNOWN ({row['id']})"
+            elif hostname in taken:
+                key = f"{hostname} ({row['id']})"
+            else:
+                key = hostname
+            taken.add(key)
+            keys.append((key, row["id"]))
+        cur.executemany("UPDATE devices SET device_key = ? WHERE id = ?", keys)
+
+        # their issues were computed by the old app: one pass over the whole fleet
+        issues = fleet_issues(cur, consistency_flags(cur))
+        cur.executemany(
+            "UPDATE devices SET issues = ? WHERE id = ?",
+            [("; ".join(messages), device_id) for device_id, messages in issues.items()],
+        )
+
+
+def batches(items, size=BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def placeholders(count):
+    return ", ".join("?" * count)
+
+
+def device_key(dev):
+    # hostname, or the uploaded file name for configs without one
+    if dev["hostname"]:
+        return dev["hostname"]
+    return f"UNKNOWN ({dev.get('source', '')})"
+
+
+def range_key(address):
+    return format(int(address), "032x")
+
+
+def ipv4_columns(ip):
+    # fast path of subnet_columns() for "a.b.c.d/len" (what the parsers store),
+    # None for anything else
+    if IPV4_CIDR_REGEX.fullmatch(ip) is None:
+        return None
+
+    address, _, prefix = ip.partition("/")
+    value = int.from_bytes(socket.inet_pton(socket.AF_INET, address), "big")
+    host_bits = (1 << (32 - int(prefix))) - 1
+    start = value & ~host_bits
+    if start != value:
+        ip = f"{start >> 24}.{start >> 16 & 255}.{start >> 8 & 255}.{start & 255}/{prefix}"
+    return ip, 4, start, start | host_bits
+
+
+def subnet_columns(ip):
+    # "10.0.0.1/24" => ("10.0.0.0/24", 4, start, end) with int addresses,
+    # (ip, None, None, None) if not an IP
+    if not ip:
+        return ip, None, None, None
+    columns = ipv4_columns(ip)
+    if columns is not None:
+        return columns
+    try:
+        net = ipaddress.ip_network(ip, strict=False)
+    except Exception:
+        return ip, None, None, None
+    return str(net), net.version, int(net.network_address), int(net.broadcast_address)
+
+
+def range_columns(version, start, end):
+    # => (ip4_start, ip4_end, ip6_start, ip6_end) of a subnet
+    if version == 4:
+        return start, end, None, None
+    if version == 6:
+        return None, None, range_key(start), range_key(end)
+    return None, None, None, None
+
+
+def interface_subnet(ip):
+    # => (ip_cidr, ip_version, ip4_start, ip4_end, ip6_start, ip6_end) columns of an interface
+    ip_cidr, version, start, end = subnet_columns(ip)
+    return (ip_cidr, version) + range_columns(version, start, end)
+
+
+def overlapping_subnets(cur, device_id, subnet):
+    """
+    Rows (device_id, id, ip_cidr, hostname) of the interfaces of other devices
+    whose subnet overlaps subnet (a row of device_subnets()).
+
+    CIDR blocks either nest or are disjoint, so these are the blocks starting
+    inside subnet (one range scan) plus the blocks containing it, which start at
+    one of its supernet addresses (one IN lookup).
+    """
+    if subnet["ip_version"] == 4:
+        start_column, end_column, key = "i.ip4_start", "i.ip4_end", int
+    else:
+        start_column, end_column, key = "i.ip6_start", "i.ip6_end", range_key
+    query = """
+        SELECT i.device_id, i.id, i.ip_cidr, d.hostname
+        FROM interfaces i JOIN devices d ON d.id = i.device_id
+        WHERE i.device_id != ? AND
+    """
+    start, end = subnet["ip_start"], subnet["ip_end"]
+    rows = cur.execute(query + f"{start_column} BETWEEN ? AND ?", (device_id, key(start), key(end))).fetchall()
+
+    # the host bits of start are 0: clearing its set bits one by one from the
+    # lowest gives every distinct supernet start (blocks at start itself were found above)
+    address = start
+    supernet_starts = []
+    while address:
+        address &= address - 1
+        supernet_starts.append(key(address))
+    if supernet_starts:
+        rows += cur.execute(
+            query + f"{start_column} IN ({placeholders(len(supernet_starts))}) AND {end_column} >= ?",
+            (device_id, *supernet_starts, key(end)),
+        ).fetchall()
+
+    return rows
+
+
+def subnet_ints(row):
+    # (ip_version, ip4_start, ip4_end, ip6_start, ip6_end) => (start, end) as ints
+    if row[0] == 4:
+        return row[1], row[2]
+    return int(row[3], 16), int(row[4], 16)
+
+
+def device_subnets(cur, device_id):
+    # => {"id", "ip_cidr", "ip_version", "ip_start", "ip_end"} of the interfaces of a
+    # device that have a subnet, in interface order, addresses as ints
+    rows = cur.execute(
+        "SELECT id, ip_cidr, ip_version, ip4_start, ip4_end, ip6_start, ip6_end FROM interfaces "
+        "WHERE device_id = ? AND ip_version IS NOT NULL ORDER BY id",
+        (device_id,),
+    ).fetchall()
+    subnets = []
+    for row in rows:
+        start, end = subnet_ints(tuple(row)[2:])
+        subnets.append({"id": row["id"], "ip_cidr": row["ip_cidr"], "ip_version": row["ip_version"],
+                        "ip_start": start, "ip_end": end})
+    return subnets
+
+
+def overlapping_devices(cur, device_id):
+    ids = set()
+    for subnet in device_subnets(cur, device_id):
+        for row in overlapping_subnets(cur, device_id, subnet):
+            ids.add(row["device_id"])
+    return ids
+
+
+def consistency_flags(cur):
+    # => (more than one OSPF area, more than one BGP ASN) over the whole fleet
+    # (DISTINCT ... LIMIT 2 stops after two values of the index)
+    areas = cur.execute("SELECT DISTINCT area FROM ospf_areas LIMIT 2").fetchall()
+    asns = cur.execute("SELECT DISTINCT bgp_asn FROM devices WHERE bgp_asn IS NOT NULL LIMIT 2").fetchall()
+    return len(areas) > 1, len(asns) > 1
+
+
+def devices_with_protocol(cur, protocol):
+    rows = cur.execute("SELECT device_id FROM protocols WHERE name = ?", (protocol,))
+    return {row["device_id"] for row in rows}
+
+
+def device_issues(cur, device_id, flags):
+    """
+    Issues of one saved device, same messages and order as apply_validations():
+    loopback, subnet overlaps (ordered by device / interface), OSPF, BGP.
+    """
+    row = cur.execute("SELECT has_loopback FROM devices WHERE id = ?", (device_id,)).fetchone()
+    issues = []
+    if not row["has_loopback"]:
+        issues.append(MISSING_LOOPBACK)
+
+    overlaps = []
+    for subnet in device_subnets(cur, device_id):
+        for other in overlapping_subnets(cur, device_id, subnet):
+            this_pos = (device_id, subnet["id"])
+            other_pos = (other["device_id"], other["id"])
+            msg = f"Subnet {subnet['ip_cidr']} overlaps with {other['hostname']} ({other['ip_cidr']})"
+            overlaps.append((min(this_pos, other_pos), max(this_pos, other_pos), msg))
+
+    seen = set(issues)
+    for first, second, msg in sorted(overlaps):
+        if msg not in seen:
+            seen.add(msg)
+            issues.append(msg)
+
+    protocols = {name for (name,) in cur.execute("SELECT name FROM protocols WHERE device_id = ?", (device_id,))}
+    ospf_inconsistent, bgp_inconsistent = flags
+    if ospf_inconsistent and "OSPF" in protocols:
+        issues.append(OSPF_INCONSISTENT)
+    if bgp_inconsistent and "BGP" in protocols:
+        issues.append(BGP_INCONSISTENT)
+
+    return issues
+
+
+def sweep_issues(loopbacks, subnets, protocols, flags):
+    """
+    The whole apply_validations() in memory: one sweep over all the subnets
+    instead of index lookups per device.
+    loopbacks: {device_id: has_loopback}
+    subnets: (device_id, ip_cidr, ip_version, start, end, hostname) ordered by device / interface
+    protocols: {device_id: protocol names}
+    Returns {device_id: issues}.
+    """
+    issues = {device_id: [] if has_lo else [MISSING_LOOPBACK] for device_id, has_lo in loopbacks.items()}
+    seen = {device_id: set(messages) for device_id, messages in issues.items()}
+
+    def add_issue(device_id, msg):
+        if msg not in seen[device_id]:
+            seen[device_id].add(msg)
+            issues[device_id].append(msg)
+
+    ranges = [(version, start, end, device_id) for device_id, ip_cidr, version, start, end, hostname in subnets]
+    for i, j in sorted(overlapping_pairs(ranges)):
+        add_issue(subnets[i][0], f"Subnet {subnets[i][1]} overlaps with {subnets[j][5]} ({subnets[j][1]})")
+        add_issue(subnets[j][0], f"Subnet {subnets[j][1]} overlaps with {subnets[i][5]} ({subnets[i][1]})")
+
+    ospf_inconsistent, bgp_inconsistent = flags
+    for device_id, messages in issues.items():
+        names = protocols.get(device_id, ())
+        if ospf_inconsistent and "OSPF" in names:
+            messages.append(OSPF_INCONSISTENT)
+        if bgp_inconsistent and "BGP" in names:
+            messages.append(BGP_INCONSISTENT)
+
+    return issues
+
+
+def fleet_issues(cur, flags):
+    # => {device_id: issues} for every saved device (sweep_issues() over the database)
+    loopbacks = {row[0]: row[1] for row in cur.execute("SELECT id, has_loopback FROM devices")}
+    rows = cur.execute("""
+        SELECT i.device_id, i.ip_cidr, i.ip_version, i.ip4_start, i.ip4_end, i.ip6_start, i.ip6_end, d.hostname
+        FROM interfaces i JOIN devices d ON d.id = i.device_id
+        WHERE i.ip_version IS NOT NULL
+        ORDER BY i.device_id, i.id
+    """).fetchall()
+    subnets = [(row[0], row[1], row[2]) + subnet_ints(tuple(row)[2:7]) + (row[7],) for row in rows]
+    protocols = {}
+    for device_id, name in cur.execute("SELECT device_id, name FROM protocols"):
+        protocols.setdefault(device_id, set()).add(name)
+    return sweep_issues(loopbacks, subnets, protocols, flags)
+
+
+def saved_hashes(hashes):
+    # => the config hashes that are already saved (unchanged configs)
+    conn = get_db()
+    found = set()
+    for batch in batches(hashes):
+        rows = conn.execute(
+            f"SELECT config_hash FROM devices WHERE config_hash IN ({placeholders(len(batch))})", batch
+        )
+        found.update(row["config_hash"] for row in rows)
+    conn.close()
+    return found
+
+
+def save_devices_to_db(devices):
+    """
+    Upserts the devices (one row per device_key, the last one wins) with batched
+    statements and keeps the cross-device issues up to date:
+    a device with the same config_hash as its saved row is skipped, the issues
+    are recomputed only for the saved devices and for the devices whose subnets
+    overlap them before or after the change (plus every OSPF / BGP device when
+    the fleet-wide area / ASN consistency flips).
+    Big saves (> FULL_RECHECK_SHARE of the fleet) recompute the whole fleet in memory.
+    Returns the number of saved devices.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    by_key = {}
+    for dev in devices:
+        by_key[device_key(dev)] = dev
+
+    saved_rows = {}
+    for batch in batches(list(by_key)):
+        rows = cur.execute(
+            f"SELECT id, device_key, config_hash FROM devices WHERE device_key IN ({placeholders(len(batch))})",
+            batch,
+        )
+        for row in rows:
+            saved_rows[row["device_key"]] = row
+
+    changed = {}
+    for key, dev in by_key.items():
+        row = saved_rows.get(key)
+        if row is not None and dev.get("config_hash") and row["config_hash"] == dev["config_hash"]:
+            continue
+        changed[key] = dev
+
+    if not changed:
+        conn.close()
+        return 0
+
+    new_keys = [key for key in changed if key not in saved_rows]
+    saved_before = cur.execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+    fleet_size = saved_before + len(new_keys)
+    full_recheck = len(changed) > FULL_RECHECK_SHARE * fleet_size
+    flags_before = consistency_flags(cur)
+    affected = set()
+
+    # replaced devices: the old neighbours lose their overlap with them
+    old_ids = [saved_rows[key]["id"] for key in changed if key in saved_rows]
+    if not full_recheck:
+        for device_id in old_ids:
+            affected.update(overlapping_devices(cur, device_id))
+    for batch in batches(old_ids):
+        for table in ("interfaces", "protocols", "ospf_areas"):
+            cur.execute(f"DELETE FROM {table} WHERE device_id IN ({placeholders(len(batch))})", batch)
+
+    cur.executemany("INSERT INTO devices (device_key) VALUES (?)", [(key,) for key in new_keys])
+    ids = {key: saved_rows[key]["id"] for key in changed if key in saved_rows}
+    for batch in batches(new_keys):
+        rows = cur.execute(
+            f"SELECT id, device_key FROM devices WHERE device_key IN ({placeholders(len(batch))})", batch
+        )
+        for row in rows:
+            ids[row["device_key"]] = row["id"]
+
+    device_rows = []
+    interface_rows = []
+    protocol_rows = []
+    area_rows = []
+    subnets = []  # (device_id, ip_cidr, ip_version, start, end, hostname) for sweep_issues()
+    for key, dev in changed.items():
+        device_id = ids[key]
+        hostname = dev["hostname"] or "UNKNOWN"
+        dev["has_loopback"] = has_loopback(dev)
+        device_rows.append((hostname, dev["vendor"], 1 if dev["has_loopback"] else 0,
+                            dev.get("config_hash"), dev.get("bgp_asn") or None, device_id))
+        for iface in dev["interfaces"]:
+            ip_cidr, version, start, end = subnet_columns(iface["ip"])
+            interface_rows.append((device_id, iface["name"], ip_cidr, version) + range_columns(version, start, end))
+            if version is not None:
+                subnets.append((device_id, ip_cidr, version, start, end, hostname))
+        protocol_rows.extend((device_id, name) for name in sorted(dev["protocols"]))
+        area_rows.extend((device_id, area) for area in dev.get("ospf_areas", []))
+
+    cur.executemany(
+        "UPDATE devices SET hostname = ?, vendor = ?, has_loopback = ?, config_hash = ?, bgp_asn = ? "
+        "WHERE id = ?",
+        device_rows,
+    )
+    cur.executemany(
+        "INSERT INTO interfaces (device_id, name, ip_cidr, ip_version, ip4_start, ip4_end, ip6_start, ip6_end) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        interface_rows,
+    )
+    cur.executemany("INSERT INTO protocols (device_id, name) VALUES (?, ?)", protocol_rows)
+    cur.executemany("INSERT INTO ospf_areas (device_id, area) VALUES (?, ?)", area_rows)
+
+    flags = consistency_flags(cur)
+    if not saved_before:
+        # new fleet: everything is in memory already, no reading back
+        protocols = {ids[key]: dev["protocols"] for key, dev in changed.items()}
+        loopbacks = {ids[key]: dev["has_loopback"] for key, dev in changed.items()}
+        issues = sweep_issues(loopbacks, subnets, protocols, flags)
+    elif full_recheck:
+        issues = fleet_issues(cur, flags)
+    else:
+        # the new neighbours, once the whole batch is in the index
+        for device_id in ids.values():
+            affected.add(device_id)
+            affected.update(overlapping_devices(cur, device_id))
+        if flags[0] != flags_before[0]:
+            affected.update(devices_with_protocol(cur, "OSPF"))
+        if flags[1] != flags_before[1]:
+            affected.update(devices_with_protocol(cur, "BGP"))
+        issues = {device_id: device_issues(cur, device_id, flags) for device_id in affected}
+
+    cur.executemany(
+        "UPDATE devices SET issues = ? WHERE id = ?",
+        [("; ".join(messages), device_id) for device_id, messages in issues.items()],
+    )
+
+    bump_generation(cur)
+    conn.commit()
+    conn.close()
+    return len(changed)
+
+
+def bump_generation(cur):
+    cur.execute(
+        "INSERT INTO db_state (name, value) VALUES ('generation', 1) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + 1"
+    )
+
+
+def saved_generation(conn):
+    row = conn.execute("SELECT value FROM db_state WHERE name = 'generation'").fetchone()
+    return row[0] if row else 0
+
+
+def dashboard_page(page=1, per_page=100, sort="hostname", descending=False,
+                   vendor=None, protocol=None, has_issues=None):
+    """
+    One page of the dashboard => (rows, total number of matching devices).
+    Filters: vendor name, protocol name, has_issues True / False (None: all).
+    One query: interface counts come from the JOIN / GROUP BY, the total from
+    a window function over the grouped rows.
+    """
+    # read before the query: a save landing in between only makes the entry stale early
+    generation = saved_generation(read_db())
+    key = (page, per_page, sort, descending, vendor, protocol, has_issues)
+    cached = _dashboard_cache.get(key)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    where = []
+    params = []
+    if vendor:
+        where.append("d.vendor = ?")
+        params.append(vendor)
+    if protocol:
+        where.append("d.id IN (SELECT device_id FROM protocols WHERE name = ?)")
+        params.append(protocol)
+    if has_issues is not None:
+        where.append("COALESCE(d.issues, '') != ''" if has_issues else "COALESCE(d.issues, '') = ''")
+
+    order = "DESC" if descending else "ASC"
+    rows = read_db().execute(f"""
+        SELECT d.id, d.hostname, d.vendor, d.has_loopback, d.issues,
+               COALESCE((SELECT GROUP_CONCAT(p.name, ',') FROM protocols p WHERE p.device_id = d.id), '')
+                   AS routing_protocols,
+               COUNT(i.id) AS if_count,
+               COUNT(*) OVER () AS total
+        FROM devices d LEFT JOIN interfaces i ON i.device_id = d.id
+        {"WHERE " + " AND ".join(where) if where else ""}
+        GROUP BY d.id
+        ORDER BY {DASHBOARD_SORTS[sort]} {order}, d.id {order}
+        LIMIT ? OFFSET ?
+    """, params + [per_page, (page - 1) * per_page]).fetchall()
+
+    if rows:
+        total = rows[0]["total"]
+    elif page > 1:
+        # past the last page: count without the page
+        total = dashboard_page(1, 1, sort, descending, vendor, protocol, has_issues)[1]
+    else:
+        total = 0
+
+    result = (rows, total)
+    with _cache_lock:
+        if len(_dashboard_cache) >= DASHBOARD_CACHE_SIZE:
+            _dashboard_cache.clear()
+        _dashboard_cache[key] = (generation, result)
+    return result
+
@@ -1,319 +1,201 @@
+import io
 import os
-import sqlite3
-import ipaddress
-from flask import Flask, request, redirect, url_for, render_template_string
-
-DB_PATH = "network_audit.db"
+import copy
+import uuid
+import asyncio
+import tarfile
+import zipfile
+import tempfile
+import threading
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from flask import Flask, request, redirect, url_for, render_template_string, jsonify
+from parsers import config_hash, parse_config
+from db import DASHBOARD_SORTS, init_db, saved_hashes, save_devices_to_db, dashboard_page
 
 app = Flask(__name__)
 
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
-def init_db():
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS devices (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            hostname TEXT,
-            vendor TEXT,
-            has_loopback INTEGER,
-            routing_protocols TEXT,
-            issues TEXT
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS interfaces (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            device_id INTEGER,
-            name TEXT,
-            ip_cidr TEXT,
-            FOREIGN KEY(device_id) REFERENCES devices(id)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
-
-
-def detect_vendor(filename, text):
-    name = filename.lower()
-    if "cisco" in name:
-        return "cisco"
-    if "huawei" in name:
-        return "huawei"
-    if "juniper" in name:
-        return "juniper"
-    # fallback by content
-    if "hostname " in text:
-        return "cisco"
-    if "sysname " in text:
-        return "huawei"
-    if "system {" in text and "host-name" in text:
-        return "juniper"
-    return "unknown"
-
-
-def parse_cisco_like(text):
-    hostname = None
-    interfaces = []
-    protocols = set()
-    acls = []
-    ospf_areas = set()
-    bgp_asn = None
-
-    current_if = None
-
-    for raw in text.splitlines():
-        line = raw.strip()
-
-        if not line or line.startswith("!"):
-            continue
-
-        # hostname
-        if line.lower().startswith("hostname "):
-            hostname = line.split()[1]
-
-        elif line.lower().startswith("sysname "):  # Huawei
-            hostname = line.split()[1]
-
-        # interfaces
-        elif line.startswith("interface "):
-            current_if = line.split()[1]
-            interfaces.append({"name": current_if, "ip": None})
-
-        elif line.startswith("ip address") and current_if:
-            parts = line.split()
-            if len(parts) >= 4:
-                ip = parts[2]
-                mask = parts[3]
-                try:
-                    net = ipaddress.ip_network(f"{ip}/{mask}", strict=False)
-                    interfaces[-1]["ip"] = str(net)
-                except Exception:
-                    pass
-
-        # OSPF / BGP routing
-        elif line.lower().startswith("router ospf"):
-            protocols.add("OSPF")
-            parts = line.split()
-            if len(parts) >= 3 and parts[2].isdigit():
-                ospf_areas.add(int(parts[2]))  # very naive: using process-id as "area"
-
-        elif line.lower().startswith("router bgp"):
-            protocols.add("BGP")
-            parts = line.split()
-            if len(parts) >= 3 and parts[2].isdigit():
-                bgp_asn = int(parts[2])
-
-        # ACL-like
-        elif line.startswith("access-list") or line.startswith("ip access-list"):
-            acls.append(line)
-
-    return {
-        "hostname": hostname,
-        "interfaces": interfaces,
-        "protocols": protocols,
-        "acls": acls,
-        "ospf_areas": ospf_areas,
-        "bgp_asn": bgp_asn,
-    }
-
-
-def parse_juniper(text):
-    hostname = None
-    interfaces = []
-    protocols = set()
-    acls = []
-    ospf_areas = set()
-    bgp_asn = None
-
-    lines = [l.strip() for l in text.splitlines()]
-    current_if = None
-
-    for i, line in enumerate(lines):
-        # hostname
-        if line.startswith("host-name"):
-            # host-name R3;
-            parts = line.split()
-            if len(parts) >= 2:
-                hostname = parts[1].rstrip(";")
-
-        # interface name
-        if " {" in line and not line.startswith("system"):
-            if line.split()[0].endswith("{"):
-                maybe_if = line.split()[0].rstrip("{")
-            else:
-                maybe_if = line.split()[0]
-            # very naive: Juniper interface naming
-            if any(maybe_if.startswith(p) for p in ["ge-", "xe-", "lo0", "lo-"]):
-                current_if = maybe_if
-                interfaces.append({"name": current_if, "ip": None})
-
-        # IP address line
-        if "address" in line and "/" in line:
-            parts = line.split()
-            for idx, p in enumerate(parts):
-                if p == "address" and idx + 1 < len(parts):
-                    cidr = parts[idx + 1].rstrip(";")
-                    try:
-                        net = ipaddress.ip_network(cidr, strict=False)
-                        if current_if:
-                            interfaces[-1]["ip"] = str(net)
-                    except Exception:
-                        pass
-
-        # BGP / OSPF detection
-        if "protocols" in line:
-            continue  # just container
-        if "bgp {" in line:
-            protocols.add("BGP")
-        if "ospf {" in line:
-            protocols.add("OSPF")
-
-        # Juniper policy as "ACL"
-        if "policy-statement" in line:
-            acls.append(line)
-
-    return {
-        "hostname": hostname,
-        "interfaces": interfaces,
-        "protocols": protocols,
-        "acls": acls,
-        "ospf_areas": ospf_areas,
-        "bgp_asn": bgp_asn,
-    }
-
+# Audit jobs: /upload only reads the files (archives are spooled to a temp file)
+# and returns a job id, the job runs on an asyncio loop in a background thread.
+# The configs are streamed in batches of JOB_BATCH_SIZE, one archive entry at a time:
+#   skip unchanged configs -> parse (process pool, PARSE_CHUNK_SIZE files per task) -> save_devices_to_db
+# while one batch is saved the next one is read and parsed, so at most two
+# batches are in memory whatever the size of the upload.
+# DB writes go through one thread so jobs never write at the same time.
+# Only the last JOBS_SIZE jobs are kept: older finished jobs are dropped (unknown job).
+JOBS = {}
+JOBS_SIZE = 1000
+JOB_BATCH_SIZE = 200
+PARSE_CHUNK_SIZE = 25
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+jobs_lock = threading.Lock()
+
+# config hash => parse_config() result, for configs uploaded again after a change
+PARSE_CACHE = {}
+PARSE_CACHE_SIZE = 1000
+
+_loop = None
+_parse_pool = None
+_db_pool = None
+
+
+def get_loop():
+    # asyncio loop + pools, started on the first upload
+    global _loop, _parse_pool, _db_pool
+    with jobs_lock:
+        if _loop is None:
+            _parse_pool = ProcessPoolExecutor()
+            _db_pool = ThreadPoolExecutor(max_workers=1)
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+    return _loop
+
+
+def update_job(job_id, **fields):
+    with jobs_lock:
+        JOBS[job_id].update(fields)
+
+
+def is_archive(filename):
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def skip_entry(name):
+    # directories are not entries here, but OS metadata files are
+    base = os.path.basename(name)
+    return name.startswith("__MACOSX/") or base.startswith(".") or not base
+
+
+def iter_archive(path):
+    # (name, bytes) of every config in a zip / tar archive, one entry in memory at a time
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and not skip_entry(info.filename):
+                    yield info.filename, zf.read(info)
+        return
+
+    with tarfile.open(path, "r:*") as tar:
+        for member in tar:
+            if member.isfile() and not skip_entry(member.name):
+                yield member.name, tar.extractfile(member).read()
+            # tarfile keeps every member it has seen, forget them
+            tar.members = []
+
+
+def iter_configs(sources):
+    # sources: [("file", filename, bytes) or ("archive", filename, temp path), ...]
+    for kind, filename, value in sources:
+        if kind == "file":
+            yield filename, value
+        else:
+            yield from iter_archive(value)
+
+
+def parse_upload(filename, data):
+    # runs in a worker process, the config is parsed line by line from the bytes
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="ignore")
+    return parse_config(filename, lines)
+
+
+def parse_uploads(uploads):
+    # runs in a worker process: [(filename, bytes), ...] => [parsed, ...]
+    return [parse_upload(filename, data) for filename, data in uploads]
+
+
+async def parse_batch(loop, job_id, batch):
+    # => parsed devices of the changed configs of batch, in batch order
+    digests = [config_hash(filename, data) for filename, data in batch]
+    known = await loop.run_in_executor(_db_pool, saved_hashes, digests)
+    changed = [(filename, data, digest)
+               for (filename, data), digest in zip(batch, digests) if digest not in known]
+    with jobs_lock:
+        JOBS[job_id]["files"] += len(batch)
+        JOBS[job_id]["unchanged"] += len(batch) - len(changed)
+
+    # configs parsed before come from PARSE_CACHE, the others go to the
+    # process pool PARSE_CHUNK_SIZE at a time (one round trip per chunk, not per file)
+    results = {digest: PARSE_CACHE[digest] for filename, data, digest in changed if digest in PARSE_CACHE}
+    misses = [(filename, data, digest) for filename, data, digest in changed if digest not in results]
+    chunks = [misses[i:i + PARSE_CHUNK_SIZE] for i in range(0, len(misses), PARSE_CHUNK_SIZE)]
+    with jobs_lock:
+        JOBS[job_id]["parsed"] += len(results)
+
+    async def parse_chunk(chunk):
+        parsed = await loop.run_in_executor(
+            _parse_pool, parse_uploads, [(filename, data) for filename, data, digest in chunk])
+        for (filename, data, digest), dev in zip(chunk, parsed):
+            results[digest] = dev
+            if len(PARSE_CACHE) >= PARSE_CACHE_SIZE:
+                PARSE_CACHE.pop(next(iter(PARSE_CACHE)))
+            PARSE_CACHE[digest] = dev
+        with jobs_lock:
+            JOBS[job_id]["parsed"] += len(chunk)
+
+    await asyncio.gather(*(parse_chunk(chunk) for chunk in chunks))
 
-def parse_config(filename, text):
-    vendor = detect_vendor(filename, text)
-
-    if vendor in ("cisco", "huawei"):
-        parsed = parse_cisco_like(text)
-    elif vendor == "juniper":
-        parsed = parse_juniper(text)
-    else:
-        # default: try cisco-like
-        parsed = parse_cisco_like(text)
-
-    parsed["vendor"] = vendor
-    return parsed
-
-
-
-def apply_validations(devices):
-    """
-    devices: list of dicts from parse_config, each extended with:
-      - hostname
-      - interfaces
-      - protocols
-      - ospf_areas
-      - bgp_asn
-      - vendor
-    This function adds:
-      - has_loopback (bool)
-      - issues (list of strings)
-    """
-    # 1) Loopback check
-    for dev in devices:
-        issues = []
-        has_lo = False
-        for iface in dev["interfaces"]:
-            name = (iface["name"] or "").lower()
-            if name.startswith("loopback0") or name == "lo0":
-                has_lo = True
+    devices = []
+    for filename, data, digest in changed:
+        # the save path adds fields to the dict, the cached one stays as parsed
+        dev = copy.deepcopy(results[digest])
+        dev["config_hash"] = digest
+        dev["source"] = filename
+        devices.append(dev)
+    return devices
+
+
+async def run_job(job_id, sources):
+    loop = asyncio.get_running_loop()
+    configs = iter_configs(sources)
+    saving = None
+    try:
+        update_job(job_id, status="running")
+        while True:
+            # archive reads block => not on the loop thread
+            batch = await loop.run_in_executor(None, lambda: list(islice(configs, JOB_BATCH_SIZE)))
+            if not batch:
                 break
-        if not has_lo:
-            issues.append("Missing Loopback0/lo0 interface")
-        dev["has_loopback"] = has_lo
-        dev["issues"] = issues
-
-    # 2) Subnet overlap between devices
-    all_nets = []  # list of (hostname, ip_network)
-    for dev in devices:
-        hostname = dev["hostname"] or "UNKNOWN"
-        for iface in dev["interfaces"]:
-            if iface["ip"]:
-                try:
-                    net = ipaddress.ip_network(iface["ip"], strict=False)
-                    all_nets.append((hostname, net))
-                except Exception:
-                    continue
-
-    for i in range(len(all_nets)):
-        host1, net1 = all_nets[i]
-        for j in range(i + 1, len(all_nets)):
-            host2, net2 = all_nets[j]
-            if host1 == host2:
-                continue
-            if net1.overlaps(net2):
-                msg1 = f"Subnet {net1} overlaps with {host2} ({net2})"
-                msg2 = f"Subnet {net2} overlaps with {host1} ({net1})"
-                for dev in devices:
-                    if dev["hostname"] == host1 and msg1 not in dev["issues"]:
-                        dev["issues"].append(msg1)
-                    if dev["hostname"] == host2 and msg2 not in dev["issues"]:
-                        dev["issues"].append(msg2)
-
-    # 3) Very basic OSPF/BGP "consistency"
-    ospf_areas_all = set()
-    bgp_asn_all = set()
-    for dev in devices:
-        for a in dev.get("ospf_areas", []):
-            ospf_areas_all.add(a)
-        asn = dev.get("bgp_asn")
-        if asn:
-            bgp_asn_all.add(asn)
-
-    if len(ospf_areas_all) > 1:
-        for dev in devices:
-            if "OSPF" in dev["protocols"]:
-                dev["issues"].append("OSPF area inconsistency across devices")
-
-    if len(bgp_asn_all) > 1:
-        for dev in devices:
-            if "BGP" in dev["protocols"]:
-                dev["issues"].append("BGP ASN inconsistency across devices")
-
-
-def save_devices_to_db(devices):
-    conn = get_db()
-    cur = conn.cursor()
-
-    # simple: clear previous data
-    cur.execute("DELETE FROM interfaces")
-    cur.execute("DELETE FROM devices")
-
-    for dev in devices:
-        hostname = dev["hostname"] or "UNKNOWN"
-        vendor = dev["vendor"]
-        has_loopback = 1 if dev.get("has_loopback") else 0
-        protocols_text = ",".join(sorted(dev["protocols"]))
-        issues_text = "; ".join(dev["issues"])
-
-        cur.execute(
-            "INSERT INTO devices (hostname, vendor, has_loopback, routing_protocols, issues) "
-            "VALUES (?, ?, ?, ?, ?)",
-            (hostname, vendor, has_loopback, protocols_text, issues_text),
-        )
-        device_id = cur.lastrowid
-
-        for iface in dev["interfaces"]:
-            cur.execute(
-                "INSERT INTO interfaces (device_id, name, ip_cidr) VALUES (?, ?, ?)",
-                (device_id, iface["name"], iface["ip"]),
-            )
-
-    conn.commit()
-    conn.close()
-
+            devices = await parse_batch(loop, job_id, batch)
+            del batch
+
+            # validations run inside the save, against the devices already saved
+            if saving is not None:
+                add_saved(job_id, await saving)
+            saving = loop.run_in_executor(_db_pool, save_devices_to_db, devices)
+            del devices
+
+        if saving is not None:
+            add_saved(job_id, await saving)
+        update_job(job_id, status="done")
+    except Exception as e:
+        update_job(job_id, status="failed", error=str(e))
+    finally:
+        configs.close()
+        for kind, filename, value in sources:
+            if kind == "archive":
+                os.remove(value)
+
+
+def add_saved(job_id, saved):
+    with jobs_lock:
+        JOBS[job_id]["devices"] += saved
+
+
+def start_job(sources):
+    # sources: see iter_configs() => job id
+    job_id = uuid.uuid4().hex
+    with jobs_lock:
+        # oldest first (insertion order), queued / running jobs are never dropped
+        finished = [key for key, job in JOBS.items() if job["status"] in ("done", "failed")]
+        for key in finished[:max(0, len(JOBS) + 1 - JOBS_SIZE)]:
+            del JOBS[key]
+        JOBS[job_id] = {"id": job_id, "status": "queued", "files": 0,
+                        "unchanged": 0, "parsed": 0, "devices": 0, "error": None}
+
+    asyncio.run_coroutine_threadsafe(run_job(job_id, sources), get_loop())
+    return job_id
 
 
 UPLOAD_FORM_HTML = """
@@ -322,6 +204,7 @@ UPLOAD_FORM_HTML = """
 <h1>Upload device configuration files</h1>
 <form method="post" enctype="multipart/form-data">
   <input type="file" name="configs" multiple>
+  (config files, or .zip / .tar(.gz) archives of configs)
   <input type="submit" value="Upload">
 </form>
 <p><a href="{{ url_for('dashboard') }}">Go to Dashboard</a></p>
@@ -332,39 +215,91 @@ UPLOAD_FORM_HTML = """
 def upload():
     if request.method == "POST":
         files = request.files.getlist("configs")
-        devices = []
+        sources = []
 
         for f in files:
             if not f.filename:
                 continue
-            content = f.read().decode("utf-8", errors="ignore")
-            parsed = parse_config(f.filename, content)
-            devices.append(parsed)
+            if is_archive(f.filename):
+                # streamed to disk in chunks, the job reads it entry by entry
+                fd, path = tempfile.mkstemp(suffix=os.path.basename(f.filename))
+                with os.fdopen(fd, "wb") as out:
+                    f.save(out)
+                sources.append(("archive", f.filename, path))
+            else:
+                sources.append(("file", f.filename, f.read()))
 
-        if not devices:
+        if not sources:
             return "No valid files uploaded", 400
 
-        apply_validations(devices)
-        save_devices_to_db(devices)
+        # parsing, validation and saving run in the background
+        job_id = start_job(sources)
 
-        return redirect(url_for("dashboard"))
+        if request.accept_mimetypes.best == "application/json":
+            return jsonify(job_id=job_id, status_url=url_for("job_status", job_id=job_id)), 202
+        return redirect(url_for("job_status", job_id=job_id))
 
     return render_template_string(UPLOAD_FORM_HTML)
 
 
+JOB_HTML = """
+<!doctype html>
+<title>Audit job {{ job.id }}</title>
+{% if job.status not in ('done', 'failed') %}<meta http-equiv="refresh" content="1">{% endif %}
+<h1>Audit job {{ job.id }}</h1>
+<p>Status: {{ job.status }} ({{ job.files }} files read, {{ job.parsed }} parsed,
+   {{ job.unchanged }} unchanged, {{ job.devices }} devices saved)</p>
+{% if job.error %}<p>Error: {{ job.error }}</p>{% endif %}
+<p><a href="{{ url_for('dashboard') }}">Go to Dashboard</a></p>
+"""
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    # queued -> running -> done / failed
+    with jobs_lock:
+        job = dict(JOBS[job_id]) if job_id in JOBS else None
+
+    if job is None:
+        return "Unknown job", 404
+
+    if request.accept_mimetypes.best == "application/json" or request.args.get("format") == "json":
+        return jsonify(job)
+    return render_template_string(JOB_HTML, job=job)
+
+
 DASHBOARD_HTML = """
 <!doctype html>
 <title>Network Audit Dashboard</title>
 <h1>Network Audit Dashboard</h1>
 <p><a href="{{ url_for('upload') }}">Upload more configs</a></p>
+<form method="get">
+  Vendor <input name="vendor" value="{{ args.vendor or '' }}" size="8">
+  Protocol <select name="protocol">
+    {% for p in ['', 'OSPF', 'BGP'] %}
+    <option value="{{ p }}" {{ 'selected' if args.protocol == p }}>{{ p or 'any' }}</option>
+    {% endfor %}
+  </select>
+  Issues <select name="issues">
+    {% for value, label in [('', 'any'), ('yes', 'with issues'), ('no', 'without issues')] %}
+    <option value="{{ value }}" {{ 'selected' if args.issues == value }}>{{ label }}</option>
+    {% endfor %}
+  </select>
+  <input type="hidden" name="sort" value="{{ args.sort }}">
+  <input type="hidden" name="order" value="{{ args.order }}">
+  <input type="submit" value="Filter">
+</form>
+<p>{{ total }} devices, page {{ args.page }} of {{ pages }}</p>
 <table border="1" cellpadding="5" cellspacing="0">
   <tr>
-    <th>Hostname</th>
-    <th>Vendor</th>
-    <th>Protocols</th>
-    <th>Has Loopback</th>
-    <th>Interface Count</th>
-    <th>Issues</th>
+    {% for sort, label in [('hostname', 'Hostname'), ('vendor', 'Vendor'), (None, 'Protocols'),
+                           ('loopback', 'Has Loopback'), ('interfaces', 'Interface Count'), ('issues', 'Issues')] %}
+    <th>
+      {% if sort %}
+      <a href="{{ page_url(sort=sort, order='desc' if args.sort == sort and args.order == 'asc' else 'asc', page=1) }}">{{ label }}</a>
+      {% else %}{{ label }}{% endif %}
+    </th>
+    {% endfor %}
   </tr>
   {% for d in devices %}
   <tr>
@@ -377,33 +312,48 @@ DASHBOARD_HTML = """
   </tr>
   {% endfor %}
 </table>
+<p>
+  {% if args.page > 1 %}<a href="{{ page_url(page=args.page - 1) }}">&laquo; previous</a>{% endif %}
+  {% if args.page < pages %}<a href="{{ page_url(page=args.page + 1) }}">next &raquo;</a>{% endif %}
+</p>
 """
 
+PER_PAGE = 100
+
+
+def int_arg(name, default, low, high):
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        value = default
+    return min(max(value, low), high)
+
 
 @app.route("/dashboard")
 def dashboard():
-    conn = get_db()
-    cur = conn.cursor()
+    # /dashboard?page=2&per_page=100&sort=interfaces&order=desc&vendor=cisco&protocol=BGP&issues=yes
+    args = {
+        "page": int_arg("page", 1, 1, 10 ** 9),
+        "per_page": int_arg("per_page", PER_PAGE, 1, 1000),
+        "sort": request.args.get("sort") if request.args.get("sort") in DASHBOARD_SORTS else "hostname",
+        "order": "desc" if request.args.get("order") == "desc" else "asc",
+        "vendor": request.args.get("vendor") or None,
+        "protocol": request.args.get("protocol") or None,
+        "issues": request.args.get("issues") if request.args.get("issues") in ("yes", "no") else "",
+    }
 
-    cur.execute("SELECT * FROM devices")
-    rows = cur.fetchall()
+    devices, total = dashboard_page(
+        args["page"], args["per_page"], args["sort"], args["order"] == "desc",
+        args["vendor"], args["protocol"], {"yes": True, "no": False}.get(args["issues"]),
+    )
+    pages = max(1, (total + args["per_page"] - 1) // args["per_page"])
 
-    devices = []
-    for row in rows:
-        cur.execute("SELECT COUNT(*) FROM interfaces WHERE device_id = ?", (row["id"],))
-        if_count = cur.fetchone()[0]
-        devices.append({
-            "hostname": row["hostname"],
-            "vendor": row["vendor"],
-            "routing_protocols": row["routing_protocols"],
-            "has_loopback": bool(row["has_loopback"]),
-            "issues": row["issues"],
-            "if_count": if_count,
-        })
-
-    conn.close()
-    return render_template_string(DASHBOARD_HTML, devices=devices)
+    def page_url(**changes):
+        query = {name: value for name, value in dict(args, **changes).items() if value}
+        return url_for("dashboard", **query)
 
+    return render_template_string(DASHBOARD_HTML, devices=devices, total=total, pages=pages,
+                                  args=args, page_url=page_url)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,474 @@
+# Config parsers, one per vendor, kept in a registry:
+#   register(vendor, sniff, parse)
+# sniff: regex searched in the first HEAD_SIZE characters of a config,
+# parse(lines) => {"hostname", "interfaces", "protocols", "acls", "ospf_areas", "bgp_asn"}
+#
+# line based dialects (Cisco IOS, Huawei VRP) share parse_lines(): a dispatch table
+# maps the first word of a line to its handler, so each line costs one split and
+# one dict lookup; Juniper is a brace tree, read with path lookups
+import io
+import re
+import hashlib
+import ipaddress
+from itertools import chain
+
+# bump when a parser changes: part of the upload hash, so saved configs are parsed again
+PARSER_VERSION = "3"
+
+# vendor => (compiled sniff regex, parse function), tried in registration order
+PARSERS = {}
+
+# the vendor is sniffed from the start of the config only
+HEAD_SIZE = 4096
+
+
+def config_hash(filename, data):
+    # the vendor may come from the file name => part of the hash, and so is the
+    # parser version: configs saved by an older parser are parsed again
+    return hashlib.sha256(PARSER_VERSION.encode() + b"\0" + filename.lower().encode()
+                          + b"\0" + data).hexdigest()
+
+
+def register(vendor, sniff, parse):
+    PARSERS[vendor] = (re.compile(sniff, re.MULTILINE), parse)
+
+
+def vendor_from_filename(filename):
+    # fallback when the content matches no parser: "R1_Cisco.cfg" => "cisco"
+    name = filename.lower()
+    for vendor in PARSERS:
+        if vendor in name:
+            return vendor
+    return "unknown"
+
+
+def detect_vendor(filename, head):
+    for vendor, (sniff, parse) in PARSERS.items():
+        if sniff.search(head):
+            return vendor
+    return vendor_from_filename(filename)
+
+
+def new_device():
+    return {
+        "hostname": None,
+        "interfaces": [],
+        "protocols": set(),
+        "acls": [],
+        "ospf_areas": set(),
+        "bgp_asn": None,
+    }
+
+
+def ospf_area(area):
+    # OSPF area "0.0.0.1" or "1" => 1
+    if area.isdigit():
+        return int(area)
+    try:
+        return int(ipaddress.IPv4Address(area))
+    except ValueError:
+        return None
+
+
+def interface_network(address, mask=None):
+    # "10.0.0.1", "255.255.255.0" / "24" / None ("2001:db8::1/64") => "10.0.0.0/24"
+    try:
+        net = ipaddress.ip_network(f"{address}/{mask}" if mask else address, strict=False)
+    except ValueError:
+        return None
+    return str(net)
+
+
+def parse_lines(lines, commands, comments):
+    """
+    commands: first word of a top level line => (handler, section)
+    section: first word of the indented lines below it => handler (or None)
+    handler(dev, words) fills dev, comments: first characters of comment lines
+    """
+    dev = new_device()
+    section = None
+
+    for line in lines:
+        words = line.split()
+        if not words or words[0][0] in comments:
+            continue
+
+        if line[0] in " \t":
+            if section:
+                handler = section.get(words[0])
+                if handler:
+                    handler(dev, words)
+            continue
+
+        handler, section = commands.get(words[0]) or commands.get(words[0].lower()) or (None, None)
+        if handler:
+            handler(dev, words)
+
+    return dev
+
+
+# shared handlers
+
+def set_hostname(dev, words):
+    if len(words) >= 2:
+        dev["hostname"] = words[1]
+
+
+def start_interface(dev, words):
+    if len(words) >= 2:
+        dev["interfaces"].append({"name": words[1], "ip": None})
+
+
+def add_acl(dev, words):
+    dev["acls"].append(" ".join(words))
+
+
+def set_interface_ip(dev, words):
+    # ip address 10.0.0.1 255.255.255.0 (Cisco) / 24 (Huawei), the primary one only
+    # (Cisco "secondary", Huawei "sub" addresses are skipped)
+    if len(words) == 4 and words[1] == "address" and dev["interfaces"]:
+        iface = dev["interfaces"][-1]
+        if iface["ip"] is None:
+            iface["ip"] = interface_network(words[2], words[3])
+
+
+def set_interface_ipv6(dev, words):
+    # ipv6 address 2001:db8::1/64 or 2001:db8::1 64, used when there is no IPv4 address
+    if len(words) >= 3 and words[1] == "address" and dev["interfaces"]:
+        iface = dev["interfaces"][-1]
+        if iface["ip"] is None:
+            mask = words[3] if len(words) >= 4 and words[3].isdigit() else None
+            iface["ip"] = interface_network(words[2], mask)
+
+
+# Cisco IOS
+
+def cisco_ip(dev, words):
+    # ip access-list extended NAME
+    if len(words) >= 2 and words[1] == "access-list":
+        add_acl(dev, words)
+
+
+def cisco_interface_ip(dev, words):
+    # ip address ... / ip ospf 10 area 0
+    if len(words) >= 2 and words[1] == "ospf":
+        if len(words) >= 5 and words[3] == "area":
+            dev["protocols"].add("OSPF")
+            area = ospf_area(words[4])
+            if area is not None:
+                dev["ospf_areas"].add(area)
+    else:
+        set_interface_ip(dev, words)
+
+
+def cisco_router(dev, words):
+    # router ospf 10 / router bgp 65000
+    if len(words) < 2:
+        return
+    protocol = words[1].lower()
+    if protocol == "ospf":
+        dev["protocols"].add("OSPF")
+    elif protocol == "bgp":
+        dev["protocols"].add("BGP")
+        if len(words) >= 3 and words[2].isdigit():
+            dev["bgp_asn"] = int(words[2])
+
+
+def cisco_ospf_network(dev, words):
+    # network 10.0.0.0 0.0.0.255 area 0 (only meaningful under router ospf)
+    if len(words) >= 5 and words[3] == "area" and "OSPF" in dev["protocols"]:
+        area = ospf_area(words[4])
+        if area is not None:
+            dev["ospf_areas"].add(area)
+
+
+CISCO_INTERFACE = {
+    "ip": cisco_interface_ip,
+    "ipv6": set_interface_ipv6,
+}
+
+CISCO_ROUTER = {
+    "network": cisco_ospf_network,
+}
+
+CISCO_COMMANDS = {
+    "hostname": (set_hostname, None),
+    "interface": (start_interface, CISCO_INTERFACE),
+    "router": (cisco_router, CISCO_ROUTER),
+    "access-list": (add_acl, None),
+    "ip": (cisco_ip, None),
+}
+
+
+def parse_cisco(lines):
+    return parse_lines(lines, CISCO_COMMANDS, "!")
+
+
+# Huawei VRP
+
+def huawei_ospf(dev, words):
+    # ospf 10 [router-id ...]
+    dev["protocols"].add("OSPF")
+
+
+def huawei_ospf_area(dev, words):
+    # " area 0" / " area 0.0.0.0" under ospf
+    if len(words) >= 2:
+        area = ospf_area(words[1])
+        if area is not None:
+            dev["ospf_areas"].add(area)
+
+
+def huawei_bgp(dev, words):
+    # bgp 65000
+    dev["protocols"].add("BGP")
+    if len(words) >= 2 and words[1].isdigit():
+        dev["bgp_asn"] = int(words[1])
+
+
+HUAWEI_INTERFACE = {
+    "ip": set_interface_ip,
+    "ipv6": set_interface_ipv6,
+}
+
+HUAWEI_OSPF = {
+    "area": huawei_ospf_area,
+}
+
+HUAWEI_COMMANDS = {
+    "sysname": (set_hostname, None),
+    "interface": (start_interface, HUAWEI_INTERFACE),
+    "ospf": (huawei_ospf, HUAWEI_OSPF),
+    "bgp": (huawei_bgp, None),
+    "acl": (add_acl, None),
+}
+
+
+def parse_huawei(lines):
+    return parse_lines(lines, HUAWEI_COMMANDS, "#")
+
+
+# Juniper configs are a brace tree: "interfaces { ge-0/0/0 { unit 0 { ... } } }"
+# one pass over the tokens builds it as nested dicts, one level per word, so
+# "unit 0 {" is tree["unit"]["0"] and "address 10.0.0.3/32;" is tree["address"]["10.0.0.3/32"]
+JUNIPER_TOKEN_REGEX = re.compile(r'"(?:[^"\\]|\\.)*"|[{};]|[^\s{};"]+')
+JUNIPER_COMMENT_REGEX = re.compile(r"(?<!\S)/\*")
+
+# interfaces {} children that are not interfaces
+JUNIPER_NOT_INTERFACES = {"interface-range", "traceoptions", "apply-groups", "apply-groups-except"}
+
+# statement prefixes
+JUNIPER_FLAGS = {"inactive:", "protect:"}
+
+
+def juniper_tokens(lines, deactivated):
+    # => tokens of each line: words, "{", "}" and ";", comments (# ... and /* ... */)
+    # dropped, "set a b c" lines come out as a b c ;
+    # "deactivate a b" / "activate a b" lines add / remove ["a", "b"] in deactivated
+    in_comment = False
+    for raw in lines:
+        line = raw.strip()
+        if in_comment:
+            if "*/" not in line:
+                continue
+            line = line.split("*/", 1)[1]
+            in_comment = False
+        if not line or line[0] == "#":
+            continue
+        # "display set" configs: one "set ..." statement per line
+        if line.startswith("set "):
+            tokens = JUNIPER_TOKEN_REGEX.findall(line[4:])
+            tokens.append(";")
+            yield tokens
+            continue
+        if line.startswith("deactivate "):
+            deactivated.append(unquote(JUNIPER_TOKEN_REGEX.findall(line[11:])))
+            continue
+        if line.startswith("activate "):
+            path = unquote(JUNIPER_TOKEN_REGEX.findall(line[9:]))
+            deactivated[:] = [other for other in deactivated if other != path]
+            continue
+        if line.startswith("delete "):
+            continue
+        # a comment starts a word ("ge-0/0/*" is a wildcard, not a comment)
+        comment = "/*" in line and JUNIPER_COMMENT_REGEX.search(line)
+        while comment:
+            before, rest = line[:comment.start()], line[comment.end():]
+            if "*/" in rest:
+                line = before + " " + rest.split("*/", 1)[1]
+                comment = JUNIPER_COMMENT_REGEX.search(line)
+            else:
+                line = before
+                in_comment = True
+                comment = None
+        yield JUNIPER_TOKEN_REGEX.findall(line)
+
+
+def unquote(words):
+    return [word[1:-1] if word[0] == '"' else word for word in words]
+
+
+def juniper_tree(lines):
+    # => nested dicts of the config, statements under "inactive:" and the paths of
+    # "deactivate" lines (display set) are left out
+    tree = {}
+    node = tree
+    stack = []
+    words = []
+    deactivated = []
+
+    for tokens in juniper_tokens(lines, deactivated):
+        for token in tokens:
+            if token == "{" or token == ";":
+                target = node
+                if words and words[0] in JUNIPER_FLAGS:
+                    if words[0] == "inactive:":
+                        target = {}  # an inactive statement is built, then dropped
+                    words = words[1:]
+                for word in words:
+                    if word[0] == '"':
+                        word = word[1:-1]
+                    target = target.get(word) or target.setdefault(word, {})
+                if token == "{":
+                    stack.append(node)
+                    node = target
+                words = []
+            elif token == "}":
+                words = []
+                if stack:
+                    node = stack.pop()
+            else:
+                words.append(token)
+
+    # the statement at the end of a deactivated path goes, like an inactive: block
+    for path in deactivated:
+        parent = tree
+        for word in path[:-1]:
+            parent = parent.get(word)
+            if parent is None:
+                break
+        else:
+            parent.pop(path[-1], None)
+
+    return tree
+
+
+def juniper_select(node, path):
+    """
+    path: words, "*" matches any child
+    juniper_select(tree, "interfaces * unit * family inet address *")
+    => [(("ge-0/0/0", "0", "172.16.1.2/24"), node), ...] the words "*" matched, in config order
+    """
+    found = [((), node)]
+    for word in path.split():
+        step = []
+        for matched, current in found:
+            if word == "*":
+                step.extend((matched + (key,), child) for key, child in current.items())
+            elif word in current:
+                step.append((matched, current[word]))
+        found = step
+    return found
+
+
+def juniper_address(unit):
+    # first inet address of a unit, first inet6 one when there is none
+    for family in ("inet", "inet6"):
+        for (cidr,), node in juniper_select(unit, f"family {family} address *"):
+            try:
+                return str(ipaddress.ip_network(cidr, strict=False))
+            except ValueError:
+                continue
+    return None
+
+
+def parse_juniper(lines):
+    tree = juniper_tree(lines)
+
+    hostname = None
+    for (name,), node in juniper_select(tree, "system host-name *"):
+        hostname = name
+
+    # the main instance and the logical systems each have interfaces / protocols /
+    # routing-options, routing instances have protocols / routing-options
+    systems = [tree] + [node for key, node in juniper_select(tree, "logical-systems *")]
+    instances = list(systems)
+    for system in systems:
+        instances.extend(node for key, node in juniper_select(system, "routing-instances *"))
+
+    # one interface per unit, unit 0 under the physical name (ge-0/0/0),
+    # the other units as ge-0/0/0.100
+    interfaces = []
+    for system in systems:
+        for (name,), node in juniper_select(system, "interfaces *"):
+            if name in JUNIPER_NOT_INTERFACES:
+                continue
+            units = juniper_select(node, "unit *")
+            if not units:
+                interfaces.append({"name": name, "ip": None})
+            for (unit,), unit_node in units:
+                interfaces.append({
+                    "name": name if unit == "0" else f"{name}.{unit}",
+                    "ip": juniper_address(unit_node),
+                })
+
+    protocols = set()
+    ospf_areas = set()
+    bgp_asn = None
+    for instance in instances:
+        if juniper_select(instance, "protocols bgp"):
+            protocols.add("BGP")
+        for version in ("ospf", "ospf3"):
+            if juniper_select(instance, f"protocols {version}"):
+                protocols.add("OSPF")
+            for (area,), node in juniper_select(instance, f"protocols {version} area *"):
+                area = ospf_area(area)
+                if area is not None:
+                    ospf_areas.add(area)
+
+    # the ASN of the main instance, else of the first logical system that has one
+    for system in systems:
+        for (asn,), node in juniper_select(system, "routing-options autonomous-system *"):
+            if bgp_asn is None and asn.isdigit():
+                bgp_asn = int(asn)
+
+    # Juniper policies / firewall filters as "ACL"
+    acls = [f"policy-statement {name}"
+            for (name,), node in juniper_select(tree, "policy-options policy-statement *")]
+    for path in ("firewall filter *", "firewall family * filter *"):
+        acls.extend(f"firewall filter {matched[-1]}" for matched, node in juniper_select(tree, path))
+
+    return {
+        "hostname": hostname,
+        "interfaces": interfaces,
+        "protocols": protocols,
+        "acls": acls,
+        "ospf_areas": ospf_areas,
+        "bgp_asn": bgp_asn,
+    }
+
+
+# detection order: the brace / "set" syntax of Juniper first, then the
+# sysname of Huawei, then Cisco
+register("juniper", r"^\s*(?:system|interfaces|protocols)\s*\{|^set (?:system|interfaces) |^\s*host-name ", parse_juniper)
+register("huawei", r"^\s*sysname\s|^return\s*$", parse_huawei)
+register("cisco", r"^\s*hostname\s|^version \d|^!", parse_cisco)
+
+
+def parse_config(filename, text):
+    # text: the whole config, or a text stream (file object) parsed line by line
+    if isinstance(text, str):
+        head = text[:HEAD_SIZE]
+        lines = text.splitlines()
+    else:
+        # the head plus the rest of its last line, then the remaining lines
+        head = text.read(HEAD_SIZE) + text.readline()
+        lines = chain(io.StringIO(head), text)
+
+    vendor = detect_vendor(filename, head)
+    # default: try cisco-like
+    parse = PARSERS[vendor][1] if vendor in PARSERS else parse_cisco
+
+    parsed = parse(lines)
+    parsed["vendor"] = vendor
+    return parsed
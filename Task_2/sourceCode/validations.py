@@ -0,0 +1,121 @@
+import ipaddress
+
+MISSING_LOOPBACK = "Missing Loopback0/lo0 interface"
+OSPF_INCONSISTENT = "OSPF area inconsistency across devices"
+BGP_INCONSISTENT = "BGP ASN inconsistency across devices"
+
+
+def has_loopback(dev):
+    for iface in dev["interfaces"]:
+        name = (iface["name"] or "").lower()
+        if name.startswith("loopback0") or name == "lo0":
+            return True
+    return False
+
+
+def overlapping_pairs(ranges):
+    """
+    ranges: list of (ip_version, start, end, owner), start / end as ints
+    Returns the index pairs (i, j), i < j, of overlapping ranges with different owners.
+
+    Two CIDR blocks either nest or are disjoint, so after sorting by
+    (start, largest first) a stack holds exactly the blocks that contain the
+    current one: O(n log n + k) for k overlaps. IPv4 and IPv6 are swept apart.
+    """
+    by_version = {4: [], 6: []}
+    for idx, (version, start, end, owner) in enumerate(ranges):
+        by_version[version].append((start, -end, idx))
+
+    pairs = []
+    for entries in by_version.values():
+        entries.sort()
+        stack = []  # (end, idx) of the blocks containing the current start
+        for start, neg_end, idx in entries:
+            while stack and stack[-1][0] < start:
+                stack.pop()
+
+            owner = ranges[idx][3]
+            for end, other in stack:
+                if ranges[other][3] != owner:
+                    pairs.append((min(idx, other), max(idx, other)))
+
+            stack.append((-neg_end, idx))
+
+    return pairs
+
+
+def apply_validations(devices):
+    """
+    devices: list of dicts from parse_config, each extended with:
+      - hostname
+      - interfaces
+      - protocols
+      - ospf_areas
+      - bgp_asn
+      - vendor
+    This function adds:
+      - has_loopback (bool)
+      - issues (list of strings)
+    """
+    # 1) Loopback check
+    for dev in devices:
+        issues = []
+        has_lo = has_loopback(dev)
+        if not has_lo:
+            issues.append(MISSING_LOOPBACK)
+        dev["has_loopback"] = has_lo
+        dev["issues"] = issues
+
+    # 2) Subnet overlap between devices
+    all_nets = []  # list of (hostname, ip_network)
+    for dev in devices:
+        hostname = dev["hostname"] or "UNKNOWN"
+        for iface in dev["interfaces"]:
+            if iface["ip"]:
+                try:
+                    net = ipaddress.ip_network(iface["ip"], strict=False)
+                    all_nets.append((hostname, net))
+                except Exception:
+                    continue
+
+    # hostname -> devices, and the issues each device already has (no list scans)
+    devices_by_host = {}
+    seen_issues = {}
+    for dev in devices:
+        devices_by_host.setdefault(dev["hostname"], []).append(dev)
+        seen_issues[id(dev)] = set(dev["issues"])
+
+    def add_issue(hostname, msg):
+        for dev in devices_by_host.get(hostname, []):
+            if msg not in seen_issues[id(dev)]:
+                seen_issues[id(dev)].add(msg)
+                dev["issues"].append(msg)
+
+    # same messages, same order as comparing every pair (i, j) of all_nets
+    ranges = [(net.version, int(net.network_address), int(net.broadcast_address), hostname)
+              for hostname, net in all_nets]
+    for i, j in sorted(overlapping_pairs(ranges)):
+        host1, net1 = all_nets[i]
+        host2, net2 = all_nets[j]
+        add_issue(host1, f"Subnet {net1} overlaps with {host2} ({net2})")
+        add_issue(host2, f"Subnet {net2} overlaps with {host1} ({net1})")
+
+    # 3) Very basic OSPF/BGP "consistency"
+    ospf_areas_all = set()
+    bgp_asn_all = set()
+    for dev in devices:
+        for a in dev.get("ospf_areas", []):
+            ospf_areas_all.add(a)
+        asn = dev.get("bgp_asn")
+        if asn:
+            bgp_asn_all.add(asn)
+
+    if len(ospf_areas_all) > 1:
+        for dev in devices:
+            if "OSPF" in dev["protocols"]:
+                dev["issues"].append(OSPF_INCONSISTENT)
+
+    if len(bgp_asn_all) > 1:
+        for dev in devices:
+            if "BGP" in dev["protocols"]:
+                dev["issues"].append(BGP_INCONSISTENT)